@@ -1,85 +1,58 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 
-
-# function to load data
-@st.cache_data
-def load_data(file):
-    df = pd.read_csv(file)
-    return df
+from kickstarter.aggregates import load_state_category_cube, state_totals
+from kickstarter.compat import fragment
+from kickstarter.figures import state_choropleth
+from kickstarter.instrumentation import rerun_timer
+from kickstarter.snapshots import page_context
 
 
 st.set_page_config(
     page_title="Kickstarter Projects")
 
-# Load data
-df = load_data('most_funded_feb_2023.csv')
-
-# filter out only US projects
-df = df[df['location_country'] == 'US']
+timer, dataset, country, file = page_context('main')
 
-# rename null values to 'Other'
-df['category_parent_name'].fillna('Other', inplace=True)
+# Load the state x category cube precomputed from the country's projects
+with timer.stage('load_data'):
+    cube = load_state_category_cube(file)
 
 # get unique categories
-unique_categories = df['category_parent_name'].unique()
+unique_categories = cube.index.get_level_values('category_parent_name').unique()
 
 
-# Create title
-st.title('Most Funded US Projects on Kickstarter')
 st.write('')
 
 # create sidebar
 st.sidebar.header('About')
 with st.sidebar:
     st.markdown('''
-    This app presents the analysis of the most funded projects on Kickstarter in the US.
+    This app presents the analysis of the most funded {} projects on Kickstarter.
     The dataset is taken from Kaggle - [URL](https://www.kaggle.com/datasets/patkle/most-funded-kickstarter-projects)
-    ''', unsafe_allow_html=True)
+    '''.format(country), unsafe_allow_html=True)
 
-    st.markdown('''The main page represents the basic statistics of the data set and the maps of the US with the total amount of pledged money per state and a total number of projects.
-    ''')
+    # only US projects are located by state code, other countries list their regions
+    if country == 'US':
+        st.markdown('''The main page represents the basic statistics of the data set and the maps of the US with the total amount of pledged money per state and a total number of projects.
+        ''')
+    else:
+        st.markdown('''The main page represents the basic statistics of the data set and a table of the regions of {} with the total amount of pledged money and the number of projects per region.
+        '''.format(country))
 
     # create multiselect for categories
     selected_categories = st.multiselect('Select categories', sorted(unique_categories), default=sorted(unique_categories))
 
-    if selected_categories:
-        # filter df using selected categories
-        df = df[df['category_parent_name'].isin(selected_categories)]
-
-
-# group and calculate sum, count, and average
-grouped_df = df.groupby("location_state").agg({"converted_pledged_amount": ["sum", "count", "mean"]}).reset_index()
-
-# rename columns
-grouped_df.columns = ["state_code", "total_pledged", "count", "average_pledged"]
-
 
-# group by state and calculate sum and average of backers_count
-grouped_df_backers = df.groupby("location_state").agg({"backers_count": ["sum", "mean"]}).reset_index()
+# sum, count, and averages per state for the selected categories (all categories if none selected)
+categories = tuple(sorted(selected_categories))
+with timer.stage('filter + aggregate'):
+    grouped_df = state_totals(file, categories)
+    timer.set_rows(len(grouped_df))
 
-# rename columns
-grouped_df_backers.columns = ["state_code", "total_backers", "average_backers"]
-
-# merge grouped_df and grouped_df_backers
-grouped_df = pd.merge(grouped_df, grouped_df_backers, on="state_code")
-
-
-# Add hover text with additional information
-hover_text = []
-for index, row in grouped_df.iterrows():
-    hover_text.append("State: {}<br>Total pledged: ${:,.0f}"
-                      "<br>Average pledged per project: ${:,.0f}"
-                      "<br>Total backers: {:,.0f}"
-                      "<br>Average backers per project: {:,.0f}"
-                      "<br>Count of projects: {:,.0f}"
-                      .format(row["state_code"], row['total_pledged'], row["average_pledged"], row['total_backers'], row['average_backers'], row["count"]))
-
-
-# Add hover text to DataFrame
-grouped_df["hover_text"] = hover_text
+# some countries' projects have no state or region at all, there is nothing to filter or map
+if grouped_df.empty:
+    st.info('No {} projects have a state or region to summarize.'.format(country))
+    timer.finish()
+    st.stop()
 
 # Get min and max values for sliders
 min_pledged = int(grouped_df['total_pledged'].min())
@@ -88,101 +61,71 @@ max_pledged = int(grouped_df['total_pledged'].max())
 min_count = int(grouped_df['count'].min())
 max_count = int(grouped_df['count'].max())
 
+# totals across the selection, averages derived from sums and counts
+total_projects = grouped_df['count'].sum()
+total_pledged = grouped_df['total_pledged'].sum()
+total_backers = grouped_df['total_backers'].sum()
+
 # create columns and display metrics
 col1, col2 = st.columns(2)
 with col1:
-    st.metric("Total Projects", value=df.shape[0], delta=None)
-    st.metric("Average Pledged per Project", value="${:,.0f}".format(df['converted_pledged_amount'].mean()), delta=None)
+    st.metric("Total Projects", value=int(total_projects), delta=None)
+    st.metric("Average Pledged per Project", value="${:,.0f}".format(total_pledged / total_projects), delta=None)
 with col2:
-    st.metric("Total Pledged", value="${:,.0f}".format(df['converted_pledged_amount'].sum()), delta=None)
-    st.metric("Average Backers per Project", value="{:,.0f}".format(df['backers_count'].mean()), delta=None)
+    st.metric("Total Pledged", value="${:,.0f}".format(total_pledged), delta=None)
+    st.metric("Average Backers per Project", value="{:,.0f}".format(total_backers / total_projects), delta=None)
 
 
 # create divider
 st.write('')
 
 st.header('Apply filters to explore data 🔍')
+slider_input_pledged = None
 if max_pledged > min_pledged:
     slider_input_pledged = st.slider('Filter by Total Pledged', min_value=min_pledged, max_value=max_pledged, step=10000000,
                                      value=(min_pledged, max_pledged), format='$%d')
-    # filter grouped_df using slider input
-    grouped_df = grouped_df[(grouped_df['total_pledged'] >=
-                             slider_input_pledged[0]) & (grouped_df['total_pledged'] <= slider_input_pledged[1])]
-
-
-# Create choropleth map with total pledged by state
-fig = px.choropleth(grouped_df,
-                    locations="state_code",
-                    locationmode="USA-states",
-                    color="total_pledged",
-                    scope="usa",
-                    custom_data=["hover_text"],
-                    hover_name=None,
-                    title="US States by Total $ Pledged")
-
-# Update hover text template to use custom hover text
-fig.update_traces(hovertemplate="%{customdata[0]}")
-
-
-# Apply custom template and styling options
-fig.update_layout(template="plotly_white",
-                  geo=dict(bgcolor="#f2f2f2",
-                           lakecolor="#ffffff",
-                           landcolor="#f2f2f2",
-                           coastlinewidth=0.5,
-                           projection=dict(type="albers usa"),
-                           showlakes=True),
-                  coloraxis=dict(colorbar=dict(title=dict(text="USD",
-                                                           font=dict(size=18))),
-                                 colorscale="Greens",
-                                 showscale=True),
-                  font=dict(size=14))
-
-# Show figure
-st.plotly_chart(fig)
-
-# create second copy of grouped_df
-grouped_df_count = grouped_df.copy()
-
-if max_count > min_count:
-    slider_input_count = st.slider('Filter by Total Projects', min_value=min_count, max_value=max_count, step=10,
-                                 value=(min_count, max_count), format='%d')
-
-    # filter grouped_df using slider input
-    grouped_df_count = grouped_df_count[(grouped_df_count['count']
-                                         >= slider_input_count[0]) & (grouped_df_count['count'] <= slider_input_count[1])]
-
-# Create choropleth map with number of projects by state
-fig_2 = px.choropleth(grouped_df_count,
-                    locations="state_code",
-                    locationmode="USA-states",
-                    color="count",
-                    scope="usa",
-                    custom_data=["hover_text"],
-                    hover_name=None,
-                    title="US States by Number of Projects")
-
-# Update hover text template to use custom hover text
-fig_2.update_traces(hovertemplate="%{customdata[0]}")
-
-# Apply custom template and styling options
-fig_2.update_layout(template="plotly_white",
-                  geo=dict(bgcolor="#f2f2f2",
-                           lakecolor="#ffffff",
-                           landcolor="#f2f2f2",
-                           coastlinewidth=0.5,
-                           projection=dict(type="albers usa"),
-                           showlakes=True),
-                  coloraxis=dict(colorbar=dict(title=dict(text="N",
-                                                           font=dict(size=18))),
-                                 colorscale="Blues",
-                                 showscale=True),
-                  font=dict(size=14))
-
-
-# Show figure
-st.plotly_chart(fig_2)
+
+
+# the choropleths locate US state codes, other countries list their regions instead
+if country != 'US':
+    regions = grouped_df
+    if slider_input_pledged:
+        regions = regions[regions['total_pledged'].between(*slider_input_pledged)]
+    st.dataframe(regions.rename(columns={'state_code': 'Region'}), use_container_width=True, hide_index=True)
+else:
+    # Create choropleth map with total pledged by state (cached per filter combination)
+    with timer.stage('figure: total pledged map'):
+        fig = state_choropleth(categories, pledged_range=slider_input_pledged, metric="total_pledged", file=file)
+
+    # Show figure
+    timer.plotly_chart(fig, 'plotly_chart: total pledged map')
+
+
+# the projects map reruns on its own when its slider moves; the pledged slider and
+# category multiselect above still rerun the whole page since both maps depend on them
+@fragment
+def projects_map(file, categories, pledged_range, min_count, max_count):
+    fragment_timer = rerun_timer('main: projects map')
+
+    count_range = None
+    if max_count > min_count:
+        count_range = st.slider('Filter by Total Projects', min_value=min_count, max_value=max_count, step=10,
+                                value=(min_count, max_count), format='%d')
+
+    # Create choropleth map with number of projects by state, filtered by both sliders
+    with fragment_timer.stage('figure: projects map'):
+        fig_2 = state_choropleth(categories, pledged_range=pledged_range, count_range=count_range, metric="count", file=file)
+
+    # Show figure
+    fragment_timer.plotly_chart(fig_2, 'plotly_chart: projects map')
+    fragment_timer.finish(panel=False)
+
+
+if country == 'US':
+    projects_map(file, categories, slider_input_pledged, min_count, max_count)
 
 with st.sidebar:
     st.markdown('''The app created by [**@Oleksandr Arsentiev**](https://twitter.com/alexarsentiev) for the purpose of
 Streamlit App-A-Thon Contest''')
+
+timer.finish()
@@ -0,0 +1,72 @@
+"""Compare the vectorized hover text formatter against the old iterrows loop.
+
+Run from the repository root:
+
+    python benchmarks/bench_hover_text.py
+"""
+import os
+import sys
+import timeit
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kickstarter.hover import format_hover_text  # noqa: E402
+
+
+SIZES = [50, 5_000, 500_000]
+
+
+def make_grouped_df(rows, seed=0):
+    # aggregate-shaped frame, labelled like a city-level map built from location_name
+    rng = np.random.default_rng(seed)
+    count = rng.integers(1, 200, rows)
+    total_pledged = rng.lognormal(14, 2, rows).round()
+    total_backers = rng.integers(10, 500_000, rows)
+    return pd.DataFrame({
+        "location_name": ["City {}".format(i) for i in range(rows)],
+        "total_pledged": total_pledged,
+        "count": count,
+        "average_pledged": total_pledged / count,
+        "total_backers": total_backers,
+        "average_backers": total_backers / count,
+    })
+
+
+def loop_hover_text(grouped_df, label="State", label_column="state_code"):
+    # the per-row loop Main.py used before
+    hover_text = []
+    for index, row in grouped_df.iterrows():
+        hover_text.append("{}: {}<br>Total pledged: ${:,.0f}"
+                          "<br>Average pledged per project: ${:,.0f}"
+                          "<br>Total backers: {:,.0f}"
+                          "<br>Average backers per project: {:,.0f}"
+                          "<br>Count of projects: {:,.0f}"
+                          .format(label, row[label_column], row['total_pledged'], row["average_pledged"],
+                                  row['total_backers'], row['average_backers'], row["count"]))
+    return hover_text
+
+
+def best_of(func, repeat):
+    return min(timeit.repeat(func, number=1, repeat=repeat))
+
+
+def main():
+    print("{:>10}  {:>12}  {:>12}  {:>8}".format("rows", "loop (s)", "vector (s)", "speedup"))
+    for rows in SIZES:
+        grouped_df = make_grouped_df(rows)
+        repeat = 5 if rows <= 5_000 else 1
+
+        expected = loop_hover_text(grouped_df, "City", "location_name")
+        actual = format_hover_text(grouped_df, "City", "location_name")
+        assert actual == expected, "vectorized hover text differs from the loop"
+
+        loop = best_of(lambda: loop_hover_text(grouped_df, "City", "location_name"), repeat)
+        vector = best_of(lambda: format_hover_text(grouped_df, "City", "location_name"), repeat)
+        print("{:>10,}  {:>12.4f}  {:>12.4f}  {:>7.1f}x".format(rows, loop, vector, loop / vector))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""Rerun latency, throughput and per-session memory under concurrent sessions.
+
+A warmed server (`python -m kickstarter.serve`) is started on a free port and
+N sessions talk to it over the same websocket protocol as the browser. Each
+session opens Main.py and every page in turn and changes each of the page's
+widgets once, like a visitor clicking through; widgets inside a fragment
+rerun only their fragment, as in the browser. A rerun is timed from sending
+the widget change until the server reports the script finished.
+
+For every concurrency level it reports:
+
+- p50/p95/p99 rerun latency and reruns per second across all sessions
+- server RSS with all N sessions still connected
+- the size of each session's st.session_state, as reported by Streamlit's
+  stats manager on /_stcore/metrics
+
+A single level's RSS is dominated by allocator noise, so per-session memory
+is the slope of a least-squares line through RSS against the number of
+connected sessions over every level; it needs at least two levels. RSS is
+read from /proc, so it is only reported on Linux. Run from the repository
+root and keep the JSON output to compare releases:
+
+    python benchmarks/bench_load.py 1 5 10 25 --json load.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from websockets.asyncio.client import connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# session state is sized in bytes rather than counted in keys on /_stcore/metrics
+SERVER = [sys.executable, '-m', 'kickstarter.serve', '--server.enableExpensiveMemoryStats', 'true']
+
+# seconds Streamlit caches the session state sizes on /_stcore/metrics
+METRICS_TTL = 5
+
+# widgets left alone, switching the country would time partition loads instead of reruns
+SKIPPED_WIDGETS = {'Country'}
+
+# what a session types into text inputs
+SEARCH_QUERY = 'board gam'
+
+# a rerun that ended in one of these counts as finished
+FINISHED = {ForwardMsg.FINISHED_SUCCESSFULLY, ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    # resident set size of a process, None where /proc isn't available
+    try:
+        with open('/proc/{}/status'.format(pid)) as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def session_state_mb(port):
+    # st.session_state of every connected session, summed by Streamlit's stats manager
+    url = 'http://127.0.0.1:{}/_stcore/metrics?families=cache_memory_bytes'.format(port)
+    with urllib.request.urlopen(url, timeout=10) as response:
+        lines = response.read().decode().splitlines()
+    return sum(float(line.split()[-1]) for line in lines
+               if line.startswith('cache_memory_bytes{cache_type="st_session_state"')) / 1024 / 1024
+
+
+def start_server(env, timeout):
+    port = _free_port()
+    server = subprocess.Popen(SERVER + ['--server.headless', 'true', '--server.port', str(port)],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if server.poll() is not None:
+            raise RuntimeError('the server exited with code {}'.format(server.returncode))
+        try:
+            with urllib.request.urlopen('http://127.0.0.1:{}/_stcore/health'.format(port), timeout=1) as response:
+                if response.status == 200:
+                    return server, port
+        except OSError:
+            time.sleep(0.1)
+    server.terminate()
+    raise RuntimeError('the server did not become healthy within {} s'.format(timeout))
+
+
+def widget_state(kind, widget):
+    # the value a visitor would change the widget to, None for widgets that aren't changed
+    state = BackMsg().rerun_script.widget_states.widgets.add()
+    state.id = widget.id
+    if kind == 'multiselect' and len(widget.options) > 1:
+        # keep the first half of the options
+        state.string_array_value.data.extend(widget.options[:len(widget.options) // 2])
+    elif kind == 'slider' and widget.max > widget.min:
+        # narrow a range to its lower half, move a single value to the middle
+        middle = widget.min + (widget.max - widget.min) // 2
+        state.double_array_value.data.extend([widget.min, middle] if len(widget.default) == 2 else [middle])
+    elif kind == 'selectbox' and len(widget.options) > 1:
+        state.string_value = widget.options[1]
+    elif kind == 'checkbox':
+        state.bool_value = not widget.default
+    elif kind == 'text_input':
+        state.string_value = SEARCH_QUERY
+    else:
+        return None
+    return state
+
+
+class Session:
+    """One simulated browser tab.
+
+    Keeps the widgets of the page it is on, keyed by label with the latest
+    proto and the fragment each one renders in, and the widget values it sent.
+    """
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.pages = []
+        self.page = None
+        self.widgets = {}
+        self.states = {}
+        self.latencies = []
+
+    async def rerun(self, fragment_id=''):
+        message = BackMsg()
+        message.rerun_script.page_script_hash = self.page or ''
+        message.rerun_script.fragment_id = fragment_id
+        for state in self.states.values():
+            message.rerun_script.widget_states.widgets.add().CopyFrom(state)
+
+        started = time.perf_counter()
+        await self.websocket.send(message.SerializeToString())
+        while True:
+            msg = ForwardMsg()
+            msg.ParseFromString(await self.websocket.recv())
+            kind = msg.WhichOneof('type')
+            if kind == 'navigation' and not self.pages:
+                self.pages = [page.page_script_hash for page in msg.navigation.app_pages]
+            elif kind == 'delta' and msg.delta.WhichOneof('type') == 'new_element':
+                element = msg.delta.new_element
+                widget_kind = element.WhichOneof('type')
+                widget = getattr(element, widget_kind)
+                if getattr(widget, 'id', '') and getattr(widget, 'label', ''):
+                    self.widgets[widget.label] = (widget_kind, widget, msg.delta.fragment_id)
+            elif kind == 'script_finished':
+                if msg.script_finished not in FINISHED:
+                    raise RuntimeError('rerun ended with status {}'.format(msg.script_finished))
+                break
+        self.latencies.append(time.perf_counter() - started)
+
+    async def open(self, page):
+        # a page opens with its default widget values
+        self.page, self.widgets, self.states = page, {}, {}
+        await self.rerun()
+
+    async def click_through(self, think):
+        for label in list(self.widgets):
+            if label in SKIPPED_WIDGETS:
+                continue
+            # the widget as last rendered, its options may depend on earlier changes
+            kind, widget, fragment_id = self.widgets[label]
+            state = widget_state(kind, widget)
+            if state is None:
+                continue
+            self.states[label] = state
+            await asyncio.sleep(think)
+            await self.rerun(fragment_id)
+
+
+async def visit(url, rounds, think, connected, release):
+    # opens every page and changes its widgets, then stays connected until released
+    async with connect(url, subprotocols=['streamlit'], max_size=None) as websocket:
+        session = Session(websocket)
+        await session.open(None)
+        for _ in range(rounds):
+            for page in session.pages or [session.page]:
+                await session.open(page)
+                await session.click_through(think)
+        connected.release()
+        await release.wait()
+        return session.latencies
+
+
+async def run_level(port, pid, sessions, rounds, think):
+    url = 'ws://127.0.0.1:{}/_stcore/stream'.format(port)
+    connected = asyncio.Semaphore(0)
+    release = asyncio.Event()
+
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(visit(url, rounds, think, connected, release)) for _ in range(sessions)]
+    for _ in range(sessions):
+        # a failed session never checks in, surface its error instead of waiting forever
+        waiter = asyncio.create_task(connected.acquire())
+        await asyncio.wait(tasks + [waiter], return_when=asyncio.FIRST_COMPLETED)
+        for task in tasks:
+            if task.done() and task.exception():
+                raise task.exception()
+        await waiter
+    elapsed = time.perf_counter() - started
+
+    # every session is done clicking but still connected, so its session state is still held;
+    # wait out the sizes the previous level left in Streamlit's metrics cache
+    await asyncio.sleep(METRICS_TTL)
+    during = rss_mb(pid)
+    session_state = await asyncio.to_thread(session_state_mb, port)
+    release.set()
+    latencies = np.array([latency for task in tasks for latency in await task]) * 1000
+
+    result = {
+        'sessions': sessions,
+        'reruns': len(latencies),
+        'p50_ms': float(np.percentile(latencies, 50)),
+        'p95_ms': float(np.percentile(latencies, 95)),
+        'p99_ms': float(np.percentile(latencies, 99)),
+        'reruns_per_s': len(latencies) / elapsed,
+        'rss_mb': during,
+        'session_state_kb': session_state * 1024 / sessions,
+    }
+    # disconnected sessions are dropped before the next level starts
+    await asyncio.sleep(1)
+    return result
+
+
+def _mb(value):
+    return '{:>10.1f}'.format(value) if value is not None else '{:>10}'.format('n/a')
+
+
+def rss_slope(results):
+    # MB of RSS per connected session, None without RSS or two distinct levels to fit
+    points = [(result['sessions'], result['rss_mb']) for result in results if result['rss_mb'] is not None]
+    if len({sessions for sessions, _ in points}) < 2:
+        return None
+    sessions, rss = np.array(points, dtype=float).T
+    return float(np.polyfit(sessions, rss, 1)[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('levels', nargs='*', type=int, default=[1, 5, 10, 25],
+                        help='numbers of concurrent sessions')
+    parser.add_argument('--rounds', type=int, default=1, help='click-throughs of every page per session')
+    parser.add_argument('--think', type=float, default=0, help='seconds a session waits between clicks')
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--json', help='also write the raw results to this file')
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, KICKSTARTER_CACHE_DIR=cache_dir, KICKSTARTER_TIMING_LOG=os.devnull)
+        server, port = start_server(env, args.timeout)
+        try:
+            # one session first, so imports and caches it fills don't count towards the levels
+            asyncio.run(run_level(port, server.pid, 1, 1, 0))
+
+            print('{:>8}  {:>7}  {:>9}  {:>9}  {:>9}  {:>9}  {:>10}  {:>10}'.format(
+                'sessions', 'reruns', 'p50 ms', 'p95 ms', 'p99 ms', 'reruns/s', 'RSS MB', 'state KB'))
+            for sessions in args.levels:
+                result = asyncio.run(run_level(port, server.pid, sessions, args.rounds, args.think))
+                results.append(result)
+                print('{:>8}  {:>7}  {:>9.1f}  {:>9.1f}  {:>9.1f}  {:>9.1f}  {}  {}'.format(
+                    sessions, result['reruns'], result['p50_ms'], result['p95_ms'], result['p99_ms'],
+                    result['reruns_per_s'], _mb(result['rss_mb']), _mb(result['session_state_kb'])))
+        finally:
+            server.terminate()
+            server.wait()
+
+    slope = rss_slope(results)
+    if slope is not None:
+        print('RSS grows by {:.2f} MB per connected session (least-squares fit over {} levels)'.format(
+            slope, len(results)))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'levels': results, 'rss_mb_per_session': slope}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+"""Headless rerun-latency benchmark for Main.py and the pages.
+
+Every (page, scale) case runs in a fresh process against a fresh cache
+directory, so the first run is a real cold start. Each case loads the page through Streamlit's AppTest
+harness, replays a scripted set of widget interactions and records the
+cold-start time, per-rerun latency and the process's peak RSS. The snapshot
+watcher only runs for the Time Trends page, which needs the time series it
+builds; elsewhere its background ingestion would be timed with the page. Run
+from the repository root:
+
+    python benchmarks/bench_reruns.py --scales 1 10 --json bench.json
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from synthetic import SCALES, ensure_synthetic  # noqa: E402
+
+
+PAGES = {
+    'main': 'Main.py',
+    'distribution': 'pages/02_Pledged_Distribution_&_Category_Analysis.py',
+    'goal': 'pages/03_Pledged_vs_Goal_&_Backers.py',
+    'takeaways': 'pages/04_Takeaways.py',
+    'trends': 'pages/05_Time_Trends.py',
+    'search': 'pages/06_Project_Search.py',
+}
+
+
+def _widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def _narrow(slider, fraction):
+    # move both handles of a range slider towards the middle
+    low, high = slider.min, slider.max
+    span = (high - low) * fraction / 2
+    return slider.set_range(low + span, high - span)
+
+
+def main_interactions(at):
+    categories = _widget(at.multiselect, 'Select categories')
+    yield 'categories', lambda: categories.set_value(categories.options[: len(categories.options) // 2])
+    yield 'total pledged slider', lambda: _narrow(_widget(at.slider, 'Filter by Total Pledged'), 0.2)
+    yield 'total projects slider', lambda: _narrow(_widget(at.slider, 'Filter by Total Projects'), 0.2)
+    yield 'all categories', lambda: _widget(at.multiselect, 'Select categories').set_value(categories.options)
+
+
+def distribution_interactions(at):
+    categories = _widget(at.multiselect, 'Select categories')
+    yield 'categories', lambda: categories.set_value(categories.options[: len(categories.options) // 2])
+    yield 'pledged slider', lambda: _narrow(_widget(at.slider, 'Filter by Pledged Amount'), 0.2)
+    # the category metric is switched in the browser, the log-bins toggle is the other widget
+    yield 'log bins', lambda: _widget(at.checkbox, 'Log-scaled bins').check()
+    yield 'all categories', lambda: _widget(at.multiselect, 'Select categories').set_value(categories.options)
+
+
+def goal_interactions(at):
+    categories = _widget(at.selectbox, 'Select category').options
+    for category in categories[:4]:
+        yield 'category: {}'.format(category), lambda category=category: _widget(at.selectbox, 'Select category').set_value(category)
+
+
+def takeaways_interactions(at):
+    return iter(())
+
+
+def trends_interactions(at):
+    categories = _widget(at.multiselect, 'Select categories')
+    yield 'categories', lambda: categories.set_value(categories.options[: len(categories.options) // 2])
+    yield 'deadline axis', lambda: _widget(at.selectbox, 'Time axis').set_value('deadline')
+    yield 'quarters', lambda: _widget(at.selectbox, 'Bucket').set_value('Q')
+    yield 'backers metric', lambda: _widget(at.selectbox, 'Metric').set_value('backers_sum')
+    yield 'window', lambda: _widget(at.slider, 'Rolling window (quarters)').set_value(2)
+
+
+def search_interactions(at):
+    for query in ['board gam', 'sanderson', 'smart watch']:
+        yield 'query: {}'.format(query), lambda query=query: _widget(at.text_input, 'Search projects').set_value(query)
+    yield 'whole words', lambda: _widget(at.checkbox, 'Match the last word as a prefix').uncheck()
+
+
+INTERACTIONS = {
+    'main': main_interactions,
+    'distribution': distribution_interactions,
+    'goal': goal_interactions,
+    'takeaways': takeaways_interactions,
+    'trends': trends_interactions,
+    'search': search_interactions,
+}
+
+
+def run_case(page, timeout):
+    # runs inside the worker process, with KICKSTARTER_DATA_FILE already set
+    from streamlit.testing.v1 import AppTest
+
+    started = time.perf_counter()
+    at = AppTest.from_file(os.path.join(ROOT, PAGES[page]), default_timeout=timeout).run()
+    # the time series is built in the background, the page only shows a notice until it is ready
+    while page == 'trends' and at.info and time.perf_counter() - started < timeout:
+        time.sleep(0.1)
+        at.run()
+    cold_start = time.perf_counter() - started
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    reruns = []
+    for label, interact in INTERACTIONS[page](at):
+        widget = interact()
+        started = time.perf_counter()
+        widget.run()
+        reruns.append({'interaction': label, 'seconds': time.perf_counter() - started})
+        if at.exception:
+            raise RuntimeError('{}: {}'.format(label, at.exception[0].value))
+
+    return {
+        'page': page,
+        'cold_start_seconds': cold_start,
+        'reruns': reruns,
+        # ru_maxrss is in KiB on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def run_in_worker(page, scale, timeout):
+    # columnar copies, result cache, time series and search index all start empty
+    with tempfile.TemporaryDirectory() as cache_dir:
+        env = dict(os.environ, KICKSTARTER_DATA_FILE=ensure_synthetic(scale), KICKSTARTER_CACHE_DIR=cache_dir,
+                   KICKSTARTER_TIMING_LOG=os.devnull,
+                   KICKSTARTER_POLL_SECONDS=os.environ.get('KICKSTARTER_POLL_SECONDS', '30') if page == 'trends' else '0')
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--worker', page, '--timeout', str(timeout)],
+                                cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    result['scale'] = scale
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', nargs='*', type=int, default=SCALES)
+    parser.add_argument('--pages', nargs='*', choices=sorted(PAGES), default=list(PAGES))
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--json', help='also write the raw results to this file')
+    parser.add_argument('--worker', choices=sorted(PAGES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        sys.path.insert(0, ROOT)
+        print(json.dumps(run_case(args.worker, args.timeout)))
+        return
+
+    results = []
+    print('{:>6}  {:<13} {:>10} {:>12} {:>12} {:>10}'.format(
+        'scale', 'page', 'cold (s)', 'rerun p50', 'rerun max', 'peak MB'))
+    for scale in args.scales:
+        for page in args.pages:
+            result = run_in_worker(page, scale, args.timeout)
+            results.append(result)
+            rerun_seconds = [r['seconds'] for r in result['reruns']] or [0.0]
+            print('{:>5}x  {:<13} {:>10.3f} {:>12.3f} {:>12.3f} {:>10.0f}'.format(
+                scale, page, result['cold_start_seconds'], statistics.median(rerun_seconds),
+                max(rerun_seconds), result['peak_rss_mb']))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""Time building the project search index and querying it at synthetic scale-ups.
+
+Synthetic rows are resampled from the real snapshot, so the vocabulary stays
+small while the posting lists grow with the scale. Run from the repository root:
+
+    python benchmarks/bench_search.py 1 10 100
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import ensure_synthetic  # noqa: E402
+from kickstarter.search import SEARCH_FIELDS, SearchIndex  # noqa: E402
+from kickstarter.storage import read_columns  # noqa: E402
+
+
+QUERIES = ['sanderson', 'board gam', 'the', 'smart watch', 'x']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scales', nargs='*', type=int, default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print("{:>10}  {:>10}  {:>10}  {:>10}  {:>12}  {:>12}".format(
+        "rows", "build (s)", "terms", "postings", "query p50 ms", "query max ms"))
+    for scale in args.scales:
+        df = read_columns(ensure_synthetic(scale), list(SEARCH_FIELDS) + ['converted_pledged_amount'])
+
+        started = time.perf_counter()
+        index = SearchIndex.build(df)
+        build = time.perf_counter() - started
+
+        timings = []
+        for query in QUERIES:
+            for _ in range(5):
+                started = time.perf_counter()
+                index.search(query)
+                timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        print("{:>10,}  {:>10.2f}  {:>10,}  {:>10,}  {:>12.2f}  {:>12.2f}".format(
+            len(df), build, len(index), len(index.documents), timings[len(timings) // 2], timings[-1]))
+
+
+if __name__ == "__main__":
+    main()
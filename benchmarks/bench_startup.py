@@ -0,0 +1,121 @@
+"""Time-to-healthy and time-to-first-render of the app, with and without warm-up.
+
+Each measurement runs in a fresh process against a fresh cache directory, so
+nothing carries over between cases:
+
+- healthy: seconds from spawning the server until /_stcore/health answers,
+  for `streamlit run` and for the warming `python -m kickstarter.serve`
+- first render: seconds the first visitor of each page waits, cold and
+  after warm-up
+
+Run from the repository root and keep the JSON output to compare releases:
+
+    python benchmarks/bench_startup.py --json startup.json
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVERS = {
+    'streamlit run': [sys.executable, '-m', 'streamlit', 'run', 'Main.py'],
+    'kickstarter.serve': [sys.executable, '-m', 'kickstarter.serve'],
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def time_to_healthy(command, env, timeout):
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(command + ['--server.headless', 'true', '--server.port', str(port)],
+                              cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen('http://127.0.0.1:{}/_stcore/health'.format(port), timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError('{} did not become healthy within {} s'.format(' '.join(command), timeout))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def first_render(page, warm, timeout):
+    # runs inside the worker process
+    sys.path.insert(0, ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    if warm:
+        from kickstarter.serve import warm_up
+        warm_up()
+    started = time.perf_counter()
+    at = AppTest.from_file(os.path.join(ROOT, page), default_timeout=timeout).run()
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return time.perf_counter() - started
+
+
+def run_worker(page, warm, env, timeout):
+    command = [sys.executable, os.path.abspath(__file__), '--worker', page, '--timeout', str(timeout)]
+    if warm:
+        command.append('--warm')
+    output = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--json', help='also write the raw results to this file')
+    parser.add_argument('--worker', help=argparse.SUPPRESS)
+    parser.add_argument('--warm', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(first_render(args.worker, args.warm, args.timeout)))
+        return
+
+    sys.path.insert(0, ROOT)
+    from kickstarter.serve import pages
+
+    results = []
+    print('{:<64} {:>10}'.format('measurement', 'seconds'))
+    for name, command in SERVERS.items():
+        with tempfile.TemporaryDirectory() as cache_dir:
+            env = dict(os.environ, KICKSTARTER_CACHE_DIR=cache_dir, KICKSTARTER_TIMING_LOG=os.devnull)
+            seconds = time_to_healthy(command, env, args.timeout)
+        results.append({'measurement': 'healthy', 'case': name, 'seconds': seconds})
+        print('{:<64} {:>10.3f}'.format('healthy: ' + name, seconds))
+
+    for path in pages():
+        page = os.path.relpath(path, ROOT)
+        for warm in (False, True):
+            with tempfile.TemporaryDirectory() as cache_dir:
+                env = dict(os.environ, KICKSTARTER_CACHE_DIR=cache_dir, KICKSTARTER_TIMING_LOG=os.devnull)
+                seconds = run_worker(page, warm, env, args.timeout)
+            case = '{} ({})'.format(os.path.basename(page), 'warm' if warm else 'cold')
+            results.append({'measurement': 'first render', 'case': case, 'seconds': seconds})
+            print('{:<64} {:>10.3f}'.format('first render: ' + case, seconds))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
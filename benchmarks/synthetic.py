@@ -0,0 +1,71 @@
+"""Generate synthetic scale-ups of most_funded_feb_2023.csv.
+
+Rows are resampled from the real snapshot with fresh ids and jittered
+amounts, so every column keeps the source schema and roughly the same
+distribution. Run from the repository root:
+
+    python benchmarks/synthetic.py 10 100
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCE_FILE = os.path.join(ROOT, 'most_funded_feb_2023.csv')
+OUTPUT_DIR = os.path.join(ROOT, 'benchmarks', 'data')
+
+SCALES = [1, 10, 100, 1000]
+
+# money columns scaled together by the same per-row factor
+PLEDGED_COLUMNS = ['converted_pledged_amount', 'pledged', 'usd_pledged']
+
+
+def synthetic_path(scale):
+    return os.path.join(OUTPUT_DIR, 'most_funded_x{}.csv'.format(scale))
+
+
+def make_synthetic(source, scale, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = len(source) * scale
+    df = source.iloc[rng.integers(0, len(source), rows)].reset_index(drop=True)
+
+    df['id'] = np.arange(1, rows + 1, dtype='int64')
+
+    factor = rng.lognormal(0, 0.25, rows)
+    for column in PLEDGED_COLUMNS:
+        df[column] = (df[column] * factor).round(2).astype(df[column].dtype)
+    df['percent_funded'] = df['percent_funded'] * factor
+    df['backers_count'] = (df['backers_count'] * rng.lognormal(0, 0.25, rows)).round().astype('int64')
+    df['goal'] = (df['goal'] * rng.lognormal(0, 0.1, rows)).round().clip(lower=1).astype('int64')
+
+    # spread launches over two years so time-based views have something to show
+    shift = rng.integers(-365, 365, rows) * 86400
+    for column in ['created_at', 'launched_at', 'deadline', 'state_changed_at']:
+        df[column] = df[column] + shift
+    return df
+
+
+def ensure_synthetic(scale, seed=0):
+    # generate the scale-up once, later runs reuse the file
+    path = synthetic_path(scale)
+    if not os.path.exists(path):
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        tmp_path = path + '.tmp'
+        make_synthetic(pd.read_csv(SOURCE_FILE), scale, seed).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('scales', nargs='*', type=int, default=SCALES)
+    args = parser.parse_args()
+    for scale in args.scales:
+        print(ensure_synthetic(scale))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import streamlit as st
+
+from kickstarter.data import CACHED_PARTITIONS, freeze, load_comparison_projects, load_projects
+from kickstarter.result_cache import cached_result
+
+
+# filter combinations whose totals are kept in memory per process; every session
+# shares the same read-only frame instead of getting its own copy
+CACHED_SELECTIONS = 256
+
+
+# sum/count cube keyed by (state, parent category), built once per dataset
+def _build_state_category_cube(file):
+    df = load_projects(file)
+    return df.groupby(["location_state", "category_parent_name"], observed=True).agg(
+        pledged_sum=("pledged_usd", "sum"),
+        project_count=("pledged_usd", "count"),
+        backers_sum=("backers_count", "sum"))
+
+
+@st.cache_resource(show_spinner=False, max_entries=CACHED_PARTITIONS)
+def load_state_category_cube(file):
+    # a warm cube from the shared disk cache spares loading the projects at all
+    return cached_result("state_category_cube", file, (), lambda: _build_state_category_cube(file))
+
+
+# per-state totals for a category selection, summed from cube slices
+@st.cache_resource(show_spinner=False, max_entries=CACHED_SELECTIONS)
+def state_totals(file, categories=()):
+    return freeze(cached_result("state_totals", file, (categories,), lambda: _state_totals(file, categories)))
+
+
+def _state_totals(file, categories):
+    cube = load_state_category_cube(file)
+
+    if categories:
+        cube = cube[cube.index.get_level_values("category_parent_name").isin(categories)]
+
+    grouped_df = cube.groupby(level="location_state", observed=True).sum().reset_index()
+    grouped_df.columns = ["state_code", "total_pledged", "count", "total_backers"]
+
+    # derive means from sums and counts
+    grouped_df["average_pledged"] = grouped_df["total_pledged"] / grouped_df["count"]
+    grouped_df["average_backers"] = grouped_df["total_backers"] / grouped_df["count"]
+
+    return grouped_df[["state_code", "total_pledged", "count", "average_pledged",
+                       "total_backers", "average_backers"]]
+
+
+# per-category totals over all states for a category selection, summed from the cube
+@st.cache_resource(show_spinner=False, max_entries=CACHED_SELECTIONS)
+def category_totals(file, categories=()):
+    return freeze(cached_result("category_totals", file, (categories,), lambda: _category_totals(file, categories)))
+
+
+def _category_totals(file, categories):
+    cube = load_state_category_cube(file)
+
+    if categories:
+        cube = cube[cube.index.get_level_values("category_parent_name").isin(categories)]
+
+    grouped_df = cube.groupby(level="category_parent_name", observed=True).sum().reset_index()
+    grouped_df.columns = ["Category", "Total pledged", "Total projects", "Total backers"]
+    grouped_df["Average pledged per project"] = grouped_df["Total pledged"] / grouped_df["Total projects"]
+
+    return grouped_df[["Category", "Total pledged", "Total projects", "Average pledged per project",
+                       "Total backers"]]
+
+
+def _category_goals(file):
+    df = load_comparison_projects(file)
+
+    # mean pledged and goal per category in one pass
+    grouped_df = df.groupby("category_parent_name", observed=True).agg(
+        avg_pledged=("pledged_usd", "mean"),
+        avg_goal=("goal", "mean")).reset_index()
+    grouped_df.columns = ["Category", "Avg pledged", "Avg goal"]
+
+    # calculate percentage of goal
+    grouped_df["Percentage of goal"] = round(grouped_df["Avg pledged"] / grouped_df["Avg goal"] * 100, 0)
+
+    # round avg pledged and avg goal to zero decimals
+    grouped_df["Avg pledged"] = grouped_df["Avg pledged"].round(0)
+    grouped_df["Avg goal"] = grouped_df["Avg goal"].round(0)
+
+    # sort df by percentage of goal
+    return grouped_df.sort_values(by="Percentage of goal", ascending=False)
+
+
+# average pledged and goal per compared category on page 03, computed once per dataset
+@st.cache_resource(show_spinner=False, max_entries=CACHED_PARTITIONS)
+def category_goals(file):
+    return freeze(cached_result("category_goals", file, (), lambda: _category_goals(file)))
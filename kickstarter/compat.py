@@ -0,0 +1,5 @@
+import streamlit as st
+
+
+# st.fragment was st.experimental_fragment before Streamlit 1.37
+fragment = getattr(st, 'fragment', None) or st.experimental_fragment
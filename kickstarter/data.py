@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from kickstarter.storage import columnar_path, read_columns, read_frame, write_frame
+
+
+# dataset shipped with the app, KICKSTARTER_DATA_FILE points the app at another snapshot
+DATA_FILE = os.environ.get('KICKSTARTER_DATA_FILE', 'most_funded_feb_2023.csv')
+
+# location_country partition the pages open with
+DEFAULT_COUNTRY = os.environ.get('KICKSTARTER_DEFAULT_COUNTRY', 'US')
+
+# columns the pages actually use, out of the 42 in the csv
+COLUMNS = ['id', 'category_parent_name', 'location_country', 'location_state',
+           'converted_pledged_amount', 'backers_count', 'goal', 'static_usd_rate']
+
+# country partitions kept in memory at once, across dataset versions; an old version
+# stays until its in-flight reruns finish
+CACHED_PARTITIONS = 16
+
+# columns stored as pandas categoricals
+CATEGORY_COLUMNS = ['category_parent_name', 'location_state']
+
+# columns that get summed across many rows keep 64 bits so totals can't overflow
+SUMMED_COLUMNS = ['pledged_usd', 'backers_count']
+
+# bump whenever prepare_projects changes, so prepared files from older code are never read
+PROJECTS_VERSION = 1
+
+
+def _downcast(series):
+    # shrink numeric columns to the smallest dtype that holds them without loss
+    if pd.api.types.is_float_dtype(series) and np.isfinite(series).all() and (series % 1 == 0).all():
+        series = series.astype('int64')
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer')
+    return series
+
+
+def freeze(df):
+    # rebuild the frame from read-only buffers, so a page that tries to mutate
+    # the shared frame fails loudly instead of changing it for every session
+    columns = {}
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy().copy()
+            codes.flags.writeable = False
+            columns[column] = pd.Categorical.from_codes(codes, dtype=series.dtype)
+        else:
+            values = series.to_numpy().copy()
+            values.flags.writeable = False
+            columns[column] = values
+    return pd.DataFrame(columns, copy=False)
+
+
+def prepare_projects(df):
+    # loaders are called with one country's partition, the country column adds nothing
+    df = df.drop(columns='location_country')
+
+    # rename null categories to 'Other'
+    df = df.assign(category_parent_name=df['category_parent_name'].fillna('Other'))
+
+    # rename converted_pledged_amount to pledged_usd
+    df = df.rename(columns={'converted_pledged_amount': 'pledged_usd'})
+
+    # goals are in the project's currency, convert them so they compare with pledged_usd
+    df = df.assign(goal=df['goal'] * df['static_usd_rate']).drop(columns='static_usd_rate')
+
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].astype('category')
+
+    for column in df.columns.difference(CATEGORY_COLUMNS + SUMMED_COLUMNS):
+        df[column] = _downcast(df[column])
+
+    return df.reset_index(drop=True)
+
+
+def projects_path(file):
+    # Arrow file holding a partition's projects already prepared, next to the partition
+    return '{}.projects-v{}.arrow'.format(columnar_path(file)[:-len('.arrow')], PROJECTS_VERSION)
+
+
+# function to load data, prepared once per host and mapped read-only into every process;
+# sessions share the one frame, processes share the file's pages
+@st.cache_resource(show_spinner=False, max_entries=CACHED_PARTITIONS)
+def load_projects(file):
+    path = projects_path(file)
+    if not os.path.exists(path):
+        write_frame(prepare_projects(read_columns(file, COLUMNS)), path)
+    return read_frame(path)
+
+
+# projects compared on page 03: categories with more than 10 projects, 'Other' dropped
+@st.cache_resource(show_spinner=False, max_entries=CACHED_PARTITIONS)
+def load_comparison_projects(file):
+    df = load_projects(file)
+    counts = df['category_parent_name'].value_counts()
+    keep = counts[(counts > 10) & (counts.index != 'Other')].index
+    df = df[df['category_parent_name'].isin(keep)]
+    df = df.assign(category_parent_name=df['category_parent_name'].cat.remove_unused_categories())
+    return freeze(df.reset_index(drop=True))
@@ -0,0 +1,130 @@
+import numpy as np
+import streamlit as st
+
+from kickstarter.data import CACHED_PARTITIONS, load_projects
+
+
+# number of histogram bins shipped to the browser
+HISTOGRAM_BINS = 50
+
+
+class PledgedDistribution:
+    """Pre-sorted pledged_usd arrays per category.
+
+    Quantiles, means and histogram counts for any category selection are
+    answered from these arrays without touching the raw rows. A pledged
+    range resolves to one contiguous slice per category via searchsorted.
+    """
+
+    def __init__(self, categories, values):
+        names, codes = np.unique(categories, return_inverse=True)
+        order = np.lexsort((values, codes))
+        codes = codes[order]
+        bounds = np.flatnonzero(np.diff(codes)) + 1
+
+        self.sorted_values = {}
+        self.prefix_sums = {}
+        for chunk_codes, chunk in zip(np.split(codes, bounds), np.split(values[order], bounds)):
+            if len(chunk):
+                category = str(names[chunk_codes[0]])
+                # prefix sums give the total of any slice in O(1)
+                prefix_sums = np.concatenate([[0], np.cumsum(chunk, dtype="float64")])
+                for array in (chunk, prefix_sums):
+                    array.flags.writeable = False
+                self.sorted_values[category] = chunk
+                self.prefix_sums[category] = prefix_sums
+
+        # every value in one sorted array, used to binary search exact quantiles
+        self.all_values = np.sort(values)
+        self.all_values.flags.writeable = False
+
+    @classmethod
+    def from_frame(cls, df, category_column="category_parent_name", value_column="pledged_usd"):
+        return cls(df[category_column].astype(str).to_numpy(), df[value_column].to_numpy())
+
+    def _slices(self, categories=(), value_range=None):
+        # (category, start, stop) of the selected values in each sorted array
+        slices = []
+        for category in (categories or self.sorted_values):
+            values = self.sorted_values.get(category)
+            if values is None:
+                continue
+            start, stop = 0, len(values)
+            if value_range is not None:
+                start = int(np.searchsorted(values, value_range[0], side="left"))
+                stop = int(np.searchsorted(values, value_range[1], side="right"))
+            if stop > start:
+                slices.append((category, start, stop))
+        return slices
+
+    def selection(self, categories=(), value_range=None):
+        # sorted views of the selected categories (all categories if none selected), no copies
+        return [self.sorted_values[c][start:stop] for c, start, stop in self._slices(categories, value_range)]
+
+    def value_bounds(self, categories=()):
+        # min and max of the selected categories, the first and last sorted values
+        arrays = self.selection(categories)
+        return min(a[0] for a in arrays), max(a[-1] for a in arrays)
+
+    def mean(self, categories=(), value_range=None):
+        slices = self._slices(categories, value_range)
+        count = sum(stop - start for _, start, stop in slices)
+        total = sum(self.prefix_sums[c][stop] - self.prefix_sums[c][start] for c, start, stop in slices)
+        return total / count if count else np.nan
+
+
+def _count_le(arrays, value):
+    return sum(int(np.searchsorted(a, value, side="right")) for a in arrays)
+
+
+def _kth_smallest(arrays, all_values, k):
+    # smallest candidate value with more than k selected values at or below it
+    low, high = 0, len(all_values) - 1
+    while low < high:
+        mid = (low + high) // 2
+        if _count_le(arrays, all_values[mid]) > k:
+            high = mid
+        else:
+            low = mid + 1
+    return all_values[low]
+
+
+def quantile(distribution, arrays, q):
+    # exact quantile with the same linear interpolation as np.percentile
+    count = sum(len(a) for a in arrays)
+    if count == 0:
+        return np.nan
+    position = q * (count - 1)
+    below = int(np.floor(position))
+    above = min(below + 1, count - 1)
+    low = float(_kth_smallest(arrays, distribution.all_values, below))
+    high = float(_kth_smallest(arrays, distribution.all_values, above)) if above != below else low
+    return low + (high - low) * (position - below)
+
+
+def histogram(arrays, bins=HISTOGRAM_BINS, log=False, value_range=None):
+    # bin counts of the selection, the last bin includes its right edge like np.histogram;
+    # an empty selection gets zero counts over value_range
+    if arrays:
+        low = min(a[0] for a in arrays)
+        high = max(a[-1] for a in arrays)
+    else:
+        low, high = value_range if value_range is not None else (0, 1)
+    if log:
+        edges = np.logspace(np.log10(max(low, 1)), np.log10(max(high, low + 1, 1)), bins + 1)
+        # pin the outer edges so rounding in logspace can't drop the extremes
+        edges[0], edges[-1] = max(low, 1), max(high, low + 1, 1)
+    else:
+        edges = np.linspace(low, max(high, low + 1), bins + 1)
+    counts = np.zeros(bins, dtype="int64")
+    for a in arrays:
+        positions = np.searchsorted(a, edges[:-1], side="left")
+        positions = np.append(positions, len(a))
+        counts += np.diff(positions)
+    return counts, edges
+
+
+# distribution of pledged amounts, built once per dataset
+@st.cache_resource(show_spinner=False, max_entries=CACHED_PARTITIONS)
+def load_pledged_distribution(file):
+    return PledgedDistribution.from_frame(load_projects(file))
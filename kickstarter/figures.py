@@ -0,0 +1,248 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+from plotly.colors import make_colorscale, sequential
+
+from kickstarter.aggregates import category_totals, state_totals
+from kickstarter.data import load_comparison_projects
+from kickstarter.distribution import histogram, load_pledged_distribution
+from kickstarter.hover import hover_text
+from kickstarter.result_cache import cached_result
+from kickstarter.scatter import build_scatter
+from kickstarter.trendlines import add_trendlines, load_trendlines
+
+
+# number of finished figures kept per process
+FIGURE_CACHE_SIZE = 128
+
+# color column, title, colorbar title and colorscale of each choropleth
+CHOROPLETH_STYLES = {
+    "total_pledged": ("total_pledged", "US States by Total $ Pledged", "USD", "Greens"),
+    "count": ("count", "US States by Number of Projects", "N", "Blues"),
+}
+
+# colorscale, title and hover label of each category bar chart
+BAR_STYLES = {
+    "Total pledged": (sequential.algae, "Total Pledged per Category", "Total Pledged"),
+    "Average pledged per project": (sequential.Brwnyl, "Average Pledged per Category", "Avg Pledged"),
+    "Total projects": (sequential.Teal, "Total Projects per Category", "Total projects"),
+    "Total backers": (sequential.Tealgrn, "Total Backers per Category", "Total backers"),
+}
+
+# title and y axis title of each page 03 scatter plot
+SCATTER_STYLES = {
+    "goal": ("Distribution of pledged and goal amounts", "Goal amount (USD)"),
+    "backers_count": ("Distribution of pledged amount and number of backers", "Number of backers"),
+}
+
+
+def _dump_figure(fig):
+    return fig.to_json().encode()
+
+
+def _load_figure(value):
+    return pio.from_json(value.decode())
+
+
+class FigureCache:
+    """Bounded LRU of finished Plotly figures keyed by their input parameters.
+
+    Keys are (name, file, *params) tuples. A miss falls through to the
+    disk-backed result cache shared with other processes before building.
+    """
+
+    def __init__(self, maxsize=FIGURE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        with self._lock:
+            if key in self._figures:
+                self.hits += 1
+                self._figures.move_to_end(key)
+                return self._figures[key]
+            self.misses += 1
+
+        # build outside the lock so one slow figure doesn't block other sessions
+        name, file, *params = key
+        fig = cached_result(name, file, params, build, dumps=_dump_figure, loads=_load_figure)
+
+        with self._lock:
+            self._figures[key] = fig
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.maxsize:
+                self._figures.popitem(last=False)
+                self.evictions += 1
+        return fig
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._figures), "maxsize": self.maxsize, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions}
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+
+# one figure cache per process, shared by every session
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    return FigureCache()
+
+
+def _build_state_choropleth(file, categories, pledged_range, count_range, metric):
+    # plotly.express takes a third of a second to import, only pay for it when building
+    import plotly.express as px
+
+    # the totals are shared read-only, the hover column goes on a new frame
+    grouped_df = state_totals(file, categories)
+    grouped_df = grouped_df.assign(hover_text=hover_text(grouped_df))
+
+    # filter grouped_df using slider inputs
+    if pledged_range is not None:
+        grouped_df = grouped_df[grouped_df["total_pledged"].between(*pledged_range)]
+    if count_range is not None:
+        grouped_df = grouped_df[grouped_df["count"].between(*count_range)]
+
+    color, title, colorbar_title, colorscale = CHOROPLETH_STYLES[metric]
+
+    # Create choropleth map by state
+    fig = px.choropleth(grouped_df,
+                        locations="state_code",
+                        locationmode="USA-states",
+                        color=color,
+                        scope="usa",
+                        custom_data=["hover_text"],
+                        hover_name=None,
+                        title=title)
+
+    # Update hover text template to use custom hover text
+    fig.update_traces(hovertemplate="%{customdata[0]}")
+
+    # Apply custom template and styling options
+    fig.update_layout(template="plotly_white",
+                      geo=dict(bgcolor="#f2f2f2",
+                               lakecolor="#ffffff",
+                               landcolor="#f2f2f2",
+                               coastlinewidth=0.5,
+                               projection=dict(type="albers usa"),
+                               showlakes=True),
+                      coloraxis=dict(colorbar=dict(title=dict(text=colorbar_title,
+                                                               font=dict(size=18))),
+                                     colorscale=colorscale,
+                                     showscale=True),
+                      font=dict(size=14))
+    return fig
+
+
+def state_choropleth(categories=(), pledged_range=None, count_range=None, metric="total_pledged", *, file):
+    key = ("state_choropleth", file, tuple(categories), pledged_range, count_range, metric)
+    return get_figure_cache().get_or_build(
+        key, lambda: _build_state_choropleth(file, tuple(categories), pledged_range, count_range, metric))
+
+
+def _metric_restyle(grouped_df_category, metric):
+    # trace properties that switch the bar chart to one metric
+    colorscale, title, hover_label = BAR_STYLES[metric]
+    values = grouped_df_category[metric].tolist()
+    return ({"x": [values], "marker.color": [values], "marker.colorscale": [make_colorscale(colorscale)],
+             "hovertemplate": [hover_label + ": %{x:.2s}<extra></extra>"]},
+            {"title.text": title})
+
+
+def _build_category_bar(file, categories):
+    grouped_df_category = category_totals(file, categories)
+
+    # create a horizontal bar chart with categories, showing total pledged first
+    trace_style, _ = _metric_restyle(grouped_df_category, "Total pledged")
+    fig = go.Figure(go.Bar(y=grouped_df_category["Category"].astype(str).tolist(), orientation='h',
+                           x=trace_style["x"][0], hovertemplate=trace_style["hovertemplate"][0],
+                           marker=dict(color=trace_style["marker.color"][0],
+                                       colorscale=trace_style["marker.colorscale"][0])))
+
+    # every metric is embedded in the figure, the dropdown switches between them in the browser
+    buttons = []
+    for metric in BAR_STYLES:
+        trace_style, layout_style = _metric_restyle(grouped_df_category, metric)
+        buttons.append(dict(label=metric, method="update", args=[trace_style, layout_style]))
+
+    # sort bar chart by the shown metric
+    fig.update_layout(title=BAR_STYLES["Total pledged"][1],
+                      yaxis={'categoryorder': 'total ascending'},
+                      updatemenus=[dict(buttons=buttons, direction="down", x=1, xanchor="right", y=1.15,
+                                        yanchor="top", showactive=True)],
+                      plot_bgcolor='#f2f2f2', font=dict(size=14))
+    return fig
+
+
+def category_bar(categories=(), *, file):
+    key = ("category_bar", file, tuple(categories))
+    return get_figure_cache().get_or_build(key, lambda: _build_category_bar(file, tuple(categories)))
+
+
+def _build_projects_scatter(file, y):
+    df = load_comparison_projects(file)
+    title, y_title = SCATTER_STYLES[y]
+
+    # create scatter plot of pledged amount against y, drawn as SVG, WebGL or a binned
+    # density depending on the row count; trendlines come from the cached fits
+    fig = build_scatter(df, 'pledged_usd', y, 'category_parent_name', {'category_parent_name': 'Category'}, title)
+    add_trendlines(fig, load_trendlines(y, file), 'pledged_usd', y)
+
+    # update axes names
+    fig.update_xaxes(title_text='Pledged amount (USD)')
+    fig.update_yaxes(title_text=y_title)
+    return fig
+
+
+def projects_scatter(y, file):
+    key = ("projects_scatter", file, y)
+    return get_figure_cache().get_or_build(key, lambda: _build_projects_scatter(file, y))
+
+
+def _short_amount(value):
+    # 1000000 -> 1M, like the %{x:.2s} hover format
+    for threshold, suffix in ((1e9, "G"), (1e6, "M"), (1e3, "k")):
+        if value >= threshold:
+            return "{:g}{}".format(round(value / threshold, 1), suffix)
+    return "{:g}".format(value)
+
+
+def _build_pledged_histogram(file, categories, value_range, log_bins):
+    arrays = load_pledged_distribution(file).selection(categories, value_range)
+    counts, edges = histogram(arrays, log=log_bins, value_range=value_range)
+
+    # bins are counted server-side, only bin positions and counts go to the browser;
+    # log-scaled bins are drawn on a log10 axis labelled in dollars
+    positions = np.log10(edges) if log_bins else edges
+    fig = go.Figure(go.Bar(x=(positions[:-1] + positions[1:]) / 2, y=counts, width=np.diff(positions),
+                           customdata=np.column_stack([edges[:-1], edges[1:]]),
+                           hovertemplate="Pledged Amount: %{customdata[0]:.2s} - %{customdata[1]:.2s}"
+                                         "<br>N: %{y}<extra></extra>"))
+
+    fig.update_layout(title="Distribution of Pledged Amounts", bargap=0)
+    # update xaxis title
+    fig.update_xaxes(title_text="Pledged Amount (USD)", showgrid=False)
+    if log_bins:
+        ticks = np.arange(np.floor(positions[0]), np.ceil(positions[-1]) + 1)
+        fig.update_xaxes(tickvals=ticks, ticktext=[_short_amount(10 ** t) for t in ticks])
+    # update yaxis title
+    fig.update_yaxes(title_text="N", showgrid=False)
+    # set background color to gray
+    fig.update_layout(plot_bgcolor='#f2f2f2', font=dict(size=14))
+    return fig
+
+
+def pledged_histogram(categories=(), value_range=None, log_bins=False, *, file):
+    key = ("pledged_histogram", file, tuple(categories), value_range, log_bins)
+    return get_figure_cache().get_or_build(
+        key, lambda: _build_pledged_histogram(file, tuple(categories), value_range, log_bins))
@@ -0,0 +1,58 @@
+import numpy as np
+import streamlit as st
+
+
+# (title, column, prefix) of each line after the label, in display order
+HOVER_FIELDS = [
+    ("Total pledged", "total_pledged", "$"),
+    ("Average pledged per project", "average_pledged", "$"),
+    ("Total backers", "total_backers", ""),
+    ("Average backers per project", "average_backers", ""),
+    ("Count of projects", "count", ""),
+]
+
+
+# every group of three digits as text, without and with leading zeros
+_GROUPS = np.array([str(group) for group in range(1000)], dtype=object)
+_PADDED_GROUPS = np.array(["{:03d}".format(group) for group in range(1000)], dtype=object)
+
+
+def _group(groups, leading):
+    # text of one group of three digits per row, zero-padded unless it leads the number
+    return np.where(leading, _GROUPS[groups], _PADDED_GROUPS[groups])
+
+
+def _thousands(values):
+    # format a whole column with thousands separators and no decimals, like "{:,.0f}",
+    # looking up each group of three digits instead of formatting every row
+    rounded = np.rint(np.asarray(values, dtype="float64"))
+    finite = np.isfinite(rounded)
+    rest = np.abs(np.where(finite, rounded, 0)).astype("int64")
+
+    # lowest group first, then one comma-separated group to the left per pass
+    text = _group(rest % 1000, rest < 1000)
+    rest = rest // 1000
+    while rest.any():
+        more = rest > 0
+        text[more] = _group(rest[more] % 1000, rest[more] < 1000) + "," + text[more]
+        rest = rest // 1000
+
+    negative = np.signbit(rounded) & finite
+    text[negative] = "-" + text[negative]
+    text[~finite] = ["{:,.0f}".format(value) for value in rounded[~finite]]
+    return text
+
+
+def format_hover_text(grouped_df, label="State", label_column="state_code"):
+    # build the labels column by column instead of row by row, so the cost
+    # stays low for county- or city-level frames keyed by location_name
+    text = label + ": " + grouped_df[label_column].astype(str).to_numpy(dtype=object)
+    for title, column, prefix in HOVER_FIELDS:
+        text = text + ("<br>" + title + ": " + prefix) + _thousands(grouped_df[column])
+    return text.tolist()
+
+
+# hover text is cached per aggregate result and shared by both choropleths
+@st.cache_data(show_spinner=False)
+def hover_text(grouped_df, label="State", label_column="state_code"):
+    return format_hover_text(grouped_df, label, label_column)
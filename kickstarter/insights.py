@@ -0,0 +1,91 @@
+import numpy as np
+import streamlit as st
+
+from kickstarter.data import CACHED_PARTITIONS, load_projects
+from kickstarter.result_cache import cached_result
+from kickstarter.storage import read_rows
+
+
+# states or categories with fewer projects are left out of per-state and per-category comparisons
+MIN_PROJECTS = 10
+
+
+def _top(series, n=1):
+    return [(label, float(value)) for label, value in series.sort_values(ascending=False).head(n).items()]
+
+
+def compute_insights(file):
+    # every takeaway is derived from one state x category pass plus column-wise statistics
+    df = load_projects(file)
+    cube = df.groupby(["location_state", "category_parent_name"], observed=True, dropna=False).agg(
+        pledged=("pledged_usd", "sum"),
+        projects=("pledged_usd", "size"),
+        backers=("backers_count", "sum"),
+        goal=("goal", "sum"))
+    categories = cube.groupby(level="category_parent_name", observed=True).sum()
+
+    # per-state comparisons leave out projects without a state
+    cube = cube[cube.index.get_level_values("location_state").notna()]
+    states = cube.groupby(level="location_state", observed=True).sum()
+    large_states = states[states["projects"] > MIN_PROJECTS]
+    large_categories = categories[(categories["projects"] > MIN_PROJECTS) & (categories.index != "Other")]
+
+    # share of each state's projects per category, for states large enough to matter
+    state_shares = cube["projects"] / cube["projects"].groupby(level="location_state", observed=True).transform("sum")
+    state_shares = state_shares[state_shares.index.get_level_values("location_state").isin(large_states.index)]
+    # share of each large category's projects coming from the most funded state
+    top_state = states["pledged"].idxmax() if len(states) else None
+    top_state_shares = (cube.loc[top_state, "projects"] / large_categories["projects"]).dropna() if len(states) else cube["projects"]
+
+    # the state leading each category, and among those the one with the most funding per project
+    leader = None
+    if len(cube):
+        leading = cube.loc[cube["pledged"].groupby(level="category_parent_name", observed=True).idxmax().to_list()]
+        leader = (leading["pledged"] / leading["projects"]).idxmax()
+
+    average_pledged = large_states["pledged"] / large_states["projects"]
+    average_backers = large_states["backers"] / large_states["projects"]
+    overfunded = (large_categories["pledged"] / large_categories["goal"]).sort_values(ascending=False)
+
+    pledged = df["pledged_usd"].to_numpy(dtype="float64")
+    correlations = None
+    if len(df) > 2:
+        # a constant column has no correlation, numpy returns nan for it
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlations = np.corrcoef(np.vstack([pledged, df["backers_count"].to_numpy(dtype="float64"),
+                                                  df["goal"].to_numpy(dtype="float64")]))
+    top_project = int(pledged.argmax())
+    top_categories = categories["pledged"].sort_values(ascending=False).index[:3]
+
+    return {
+        "projects": int(len(df)),
+        "top_states": _top(states["pledged"], 3),
+        "most_projects_state": states["projects"].idxmax() if len(states) else None,
+        "average_pledged": float(pledged.mean()),
+        "state_average_pledged": tuple(map(float, np.quantile(average_pledged, [0.25, 0.75]))) if len(average_pledged) > 1 else None,
+        "backers_range": ((average_backers.idxmin(), float(average_backers.min())),
+                          (average_backers.idxmax(), float(average_backers.max()))) if len(average_backers) > 1 else None,
+        "dominant_category": (*state_shares.idxmax(), float(state_shares.max())) if len(state_shares) else None,
+        "category_leader": (*leader, float(cube.loc[leader, "pledged"]), int(cube.loc[leader, "projects"])) if leader else None,
+        "top_state_shares": (top_state, _top(top_state_shares, 2)),
+        "pledged_skew": float(df["pledged_usd"].skew()) if len(df) > 2 else 0.0,
+        "pledged_max": float(pledged.max()),
+        "pledged_median": float(np.median(pledged)),
+        "top_categories": list(top_categories),
+        "top_categories_lead_everywhere": bool(
+            set(categories["projects"].nlargest(3).index) == set(top_categories)
+            and set(categories["backers"].nlargest(3).index) == set(top_categories)),
+        "overfunded": [(category, float(large_categories.loc[category, "goal"] / large_categories.loc[category, "projects"]),
+                        float(large_categories.loc[category, "pledged"] / large_categories.loc[category, "projects"]))
+                       for category in overfunded.index[:3]],
+        "correlations": {"backers_count": float(correlations[0, 1]), "goal": float(correlations[0, 2])}
+        if correlations is not None else None,
+        "top_project": (read_rows(file, ["name"], [top_project])["name"].iloc[0], float(pledged[top_project]),
+                        int(df["backers_count"].iloc[top_project])),
+    }
+
+
+# takeaways per country partition, keyed by the partition's content hash in the shared cache
+@st.cache_resource(show_spinner=False, max_entries=CACHED_PARTITIONS)
+def load_insights(file):
+    return cached_result("insights", file, (), lambda: compute_insights(file))
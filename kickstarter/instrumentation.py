@@ -0,0 +1,158 @@
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+import streamlit as st
+
+from kickstarter.result_cache import get_result_cache
+
+
+# opt-in: set KICKSTARTER_PROFILE=1 to time every stage of every rerun
+ENABLED = os.environ.get('KICKSTARTER_PROFILE', '').lower() in ('1', 'true', 'yes', 'on')
+
+# structured timing log, one JSON object per stage and rerun
+TIMING_LOG = os.environ.get('KICKSTARTER_TIMING_LOG', 'timings.jsonl')
+
+_log_lock = threading.Lock()
+
+
+class _StageMemory:
+    """Process-wide bookkeeping for per-stage peak memory.
+
+    tracemalloc has one peak for the whole process, so a stage can only
+    attribute it while no other stage runs; a stage that overlaps another
+    one, such as a concurrent session's rerun, records no peak.
+    """
+
+    def __init__(self):
+        self.active = 0
+        self.started = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        # -> (alone, number of stages started so far, traced bytes before the stage)
+        with self._lock:
+            alone = self.active == 0
+            self.active += 1
+            self.started += 1
+            if alone:
+                tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            return alone, self.started, before
+
+    def exit(self, alone, started, before):
+        # peak MB of the stage, None if another stage ran at the same time
+        with self._lock:
+            _, peak = tracemalloc.get_traced_memory()
+            self.active -= 1
+            if alone and self.started == started:
+                return (peak - before) / 2 ** 20
+            return None
+
+
+_stage_memory = _StageMemory()
+
+
+class RerunTimer:
+    """Per-rerun stage timings for one page.
+
+    When profiling is disabled every method is a cheap no-op, so pages can
+    wrap their stages unconditionally.
+    """
+
+    def __init__(self, page, enabled=ENABLED):
+        self.page = page
+        self.enabled = enabled
+        self.run_id = uuid.uuid4().hex[:12]
+        self.stages = []
+        self._current = None
+        self.started = time.perf_counter()
+        if enabled and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        if not self.enabled:
+            yield self
+            return
+        record = {'stage': name, 'seconds': None, 'rows': rows, 'payload_bytes': None, 'peak_mb': None}
+        self._current = record
+        memory = _stage_memory.enter()
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            record['seconds'] = time.perf_counter() - started
+            record['peak_mb'] = _stage_memory.exit(*memory)
+            self.stages.append(record)
+            self._current = None
+
+    def set_rows(self, rows):
+        # row count of the running stage, for stages that only know it at the end
+        if self.enabled and self._current is not None:
+            self._current['rows'] = rows
+
+    def plotly_chart(self, fig, name='plotly_chart', **kwargs):
+        # st.plotly_chart, timed together with the size of the serialized figure
+        if not self.enabled:
+            return st.plotly_chart(fig, **kwargs)
+        with self.stage(name):
+            result = st.plotly_chart(fig, **kwargs)
+        self.stages[-1]['payload_bytes'] = len(fig.to_json())
+        return result
+
+    def finish(self, panel=True):
+        # show the breakdown in the sidebar and append it to the timing log;
+        # fragments pass panel=False since they can't write to the sidebar
+        if not self.enabled:
+            return
+        total = time.perf_counter() - self.started
+        # stages that overlapped another session's have no peak of their own
+        peaks = [stage['peak_mb'] for stage in self.stages if stage['peak_mb'] is not None]
+        peak_mb = max(peaks) if peaks else None
+        _write_log(self, total, peak_mb)
+        if not panel:
+            return
+
+        with st.sidebar.expander('Rerun timings', expanded=False):
+            traced, _ = tracemalloc.get_traced_memory()
+            st.caption('{} rerun {}: {:.0f} ms total, peak traced memory {}, {:.1f} MB traced in the process'.format(
+                self.page, self.run_id, total * 1000,
+                'n/a (overlapped other reruns)' if peak_mb is None else '{:.1f} MB'.format(peak_mb),
+                traced / 2 ** 20))
+            timings = pd.DataFrame(self.stages, columns=['stage', 'seconds', 'rows', 'payload_bytes', 'peak_mb'])
+            timings['ms'] = timings.pop('seconds') * 1000
+            st.dataframe(timings, hide_index=True, use_container_width=True)
+
+            result_cache = get_result_cache()
+            if result_cache is not None:
+                stats = result_cache.stats()
+                st.caption('Shared result cache: {} entries, {:.1f} MB, hit rate {}'.format(
+                    stats['entries'], stats['bytes'] / 2 ** 20,
+                    '-' if stats['hit_rate'] is None else '{:.0%}'.format(stats['hit_rate'])))
+
+            # imported here so the timing log can be used without loading plotly
+            from kickstarter.figures import get_figure_cache
+
+            stats = get_figure_cache().stats()
+            st.caption('Figure cache: {} of {} figures, {} hits, {} misses, {} evictions'.format(
+                stats['size'], stats['maxsize'], stats['hits'], stats['misses'], stats['evictions']))
+
+
+def _write_log(timer, total, peak_mb):
+    timestamp = time.time()
+    lines = [json.dumps({'ts': timestamp, 'page': timer.page, 'run_id': timer.run_id, **stage})
+             for stage in timer.stages]
+    lines.append(json.dumps({'ts': timestamp, 'page': timer.page, 'run_id': timer.run_id, 'stage': 'total',
+                             'seconds': total, 'rows': None, 'payload_bytes': None, 'peak_mb': peak_mb}))
+    with _log_lock, open(TIMING_LOG, 'a') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def rerun_timer(page):
+    return RerunTimer(page)
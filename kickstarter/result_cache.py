@@ -0,0 +1,227 @@
+import hashlib
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from importlib.metadata import version
+
+import streamlit as st
+
+from kickstarter.storage import CACHE_DIR, source_fingerprint
+
+
+# sqlite file shared by every server process on the host, empty string disables it
+RESULT_CACHE_PATH = os.environ.get('KICKSTARTER_RESULT_CACHE', os.path.join(CACHE_DIR, 'results.sqlite'))
+
+# least recently used entries are evicted once the cache grows past this size
+RESULT_CACHE_MAX_BYTES = int(os.environ.get('KICKSTARTER_RESULT_CACHE_MAX_BYTES', 256 * 2 ** 20))
+
+# lookups are plain reads; their hit/miss counts and access times are buffered per process
+# and written at most this often, or with the next put, so reads never queue on the write lock
+STATS_FLUSH_SECONDS = 5
+
+# milliseconds a buffered stats write waits for the write lock before it is left for later
+STATS_FLUSH_BUSY_MS = 50
+
+# pickled frames and figures depend on the library versions that wrote them
+LIBRARY_VERSIONS = tuple(version(package) for package in ('pandas', 'plotly'))
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+'''
+
+
+class ResultCache:
+    """Size-bounded LRU of serialized results in a local SQLite file.
+
+    The file runs in WAL mode, so several processes can read and write it
+    concurrently; hit, miss and eviction counters are stored alongside the
+    entries and therefore cover every process sharing the file. Lookups
+    only read: their counters and LRU access times are buffered and written
+    in one transaction every STATS_FLUSH_SECONDS or with the next put.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_bytes=RESULT_CACHE_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._pending_lock = threading.Lock()
+        self._pending_hits = 0
+        self._pending_misses = 0
+        self._pending_access = {}
+        self._flushed_at = time.monotonic()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self):
+        # sqlite connections can't be shared between threads, keep one per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        # BEGIN IMMEDIATE takes the write lock up front, so concurrent writers queue on busy_timeout
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _count(self, connection, name, amount=1):
+        connection.execute('INSERT INTO counters (name, value) VALUES (?, ?) '
+                           'ON CONFLICT (name) DO UPDATE SET value = value + excluded.value', (name, amount))
+
+    def _flush(self, connection):
+        # write the buffered counters and access times inside the caller's transaction
+        with self._pending_lock:
+            hits, misses, access = self._pending_hits, self._pending_misses, self._pending_access
+            self._pending_hits, self._pending_misses, self._pending_access = 0, 0, {}
+            self._flushed_at = time.monotonic()
+        try:
+            if hits:
+                self._count(connection, 'hits', hits)
+            if misses:
+                self._count(connection, 'misses', misses)
+            connection.executemany('UPDATE entries SET last_access = MAX(last_access, ?) WHERE key = ?',
+                                   [(accessed, key) for key, accessed in access.items()])
+        except BaseException:
+            self._restore(hits, misses, access)
+            raise
+
+    def _restore(self, hits, misses, access):
+        # put back stats whose write was rolled back, newer access times win
+        with self._pending_lock:
+            self._pending_hits += hits
+            self._pending_misses += misses
+            for key, accessed in access.items():
+                self._pending_access[key] = max(accessed, self._pending_access.get(key, accessed))
+
+    def flush(self):
+        # best effort: if another process holds the write lock the stats wait for the next flush
+        connection = self._connection()
+        connection.execute('PRAGMA busy_timeout = {}'.format(STATS_FLUSH_BUSY_MS))
+        try:
+            with self._transaction() as connection:
+                self._flush(connection)
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            connection.execute('PRAGMA busy_timeout = 30000')
+
+    def get(self, key):
+        row = self._connection().execute('SELECT value FROM entries WHERE key = ?', (key,)).fetchone()
+        with self._pending_lock:
+            if row is None:
+                self._pending_misses += 1
+            else:
+                self._pending_hits += 1
+                self._pending_access[key] = time.time()
+            due = time.monotonic() - self._flushed_at >= STATS_FLUSH_SECONDS
+        if due:
+            self.flush()
+        return None if row is None else row[0]
+
+    def put(self, key, value):
+        if len(value) > self.max_bytes:
+            return
+        with self._transaction() as connection:
+            # access times first, so eviction sees the current LRU order
+            self._flush(connection)
+            connection.execute('INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)',
+                               (key, value, len(value), time.time()))
+            # drop the least recently used entries beyond max_bytes
+            evicted = connection.execute('''
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM (
+                        SELECT key, SUM(size) OVER (ORDER BY last_access DESC, key) AS running FROM entries
+                    ) WHERE running > ?
+                )''', (self.max_bytes,)).rowcount
+            if evicted:
+                self._count(connection, 'evictions', evicted)
+
+    def get_or_compute(self, key, compute, dumps=pickle.dumps, loads=pickle.loads):
+        # the cache only ever saves work: a locked, read-only or corrupt file, or an entry
+        # that no longer unpickles, falls back to computing the result
+        try:
+            value = self.get(key)
+        except sqlite3.Error as e:
+            logger.warning('Result cache lookup of %s failed: %s', key, e)
+            value = None
+        if value is not None:
+            try:
+                return loads(value)
+            except Exception as e:
+                logger.warning('Discarding unreadable cached result %s: %s', key, e)
+        result = compute()
+        try:
+            self.put(key, dumps(result))
+        except sqlite3.Error as e:
+            logger.warning('Result cache store of %s failed: %s', key, e)
+        return result
+
+    def stats(self):
+        self.flush()
+        connection = self._connection()
+        counters = dict(connection.execute('SELECT name, value FROM counters').fetchall())
+        entries, size = connection.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries').fetchone()
+        hits, misses = counters.get('hits', 0), counters.get('misses', 0)
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes, 'hits': hits, 'misses': misses,
+                'evictions': counters.get('evictions', 0),
+                'hit_rate': hits / (hits + misses) if hits + misses else None}
+
+    def clear(self):
+        with self._pending_lock:
+            self._pending_hits, self._pending_misses, self._pending_access = 0, 0, {}
+        with self._transaction() as connection:
+            connection.execute('DELETE FROM entries')
+            connection.execute('DELETE FROM counters')
+
+
+def result_key(name, file, *params):
+    # results are keyed by the dataset's content hash, not its path, so a changed
+    # snapshot never serves stale results and identical copies share entries; the
+    # library versions keep pickles written before an upgrade from being loaded
+    text = repr((name, source_fingerprint(file), params, LIBRARY_VERSIONS))
+    return '{}:{}'.format(name, hashlib.sha256(text.encode()).hexdigest())
+
+
+# one connection pool per process onto the shared file, None when disabled
+@st.cache_resource(show_spinner=False)
+def get_result_cache():
+    if not RESULT_CACHE_PATH:
+        return None
+    try:
+        return ResultCache()
+    except (OSError, sqlite3.Error) as e:
+        logger.warning('Result cache %s is unavailable, results are computed per process: %s', RESULT_CACHE_PATH, e)
+        return None
+
+
+def cached_result(name, file, params, compute, dumps=pickle.dumps, loads=pickle.loads):
+    cache = get_result_cache()
+    if cache is None:
+        return compute()
+    return cache.get_or_compute(result_key(name, file, *params), compute, dumps, loads)
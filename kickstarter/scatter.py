@@ -0,0 +1,97 @@
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.colors import qualitative
+
+
+# up to this many points the scatter is drawn as SVG, which stays responsive well past
+# the roughly 1,600 rows of the full dataset
+SVG_MAX_POINTS = 5_000
+
+# up to this many points the scatter is drawn with WebGL traces
+WEBGL_MAX_POINTS = 100_000
+
+# above WEBGL_MAX_POINTS the points are binned server-side into a bins x bins density grid
+DENSITY_BINS = 120
+
+# share of points kept as individual markers in density mode, from each tail of both axes
+OUTLIER_TAIL = 0.001
+
+# upper bound on the outlier markers sent to the browser in density mode
+MAX_OUTLIERS = 2_000
+
+
+def scatter_mode(rows):
+    if rows <= SVG_MAX_POINTS:
+        return "svg"
+    if rows <= WEBGL_MAX_POINTS:
+        return "webgl"
+    return "density"
+
+
+def category_colors(categories):
+    # the colors px would give each category, so density mode matches the other modes
+    template = pio.templates[pio.templates.default] if pio.templates.default else None
+    colorway = (template.layout.colorway if template is not None else None) or qualitative.Plotly
+    return {category: colorway[i % len(colorway)] for i, category in enumerate(categories)}
+
+
+def _log_edges(values, bins):
+    # log-spaced bin edges, the pledged/goal/backers columns are heavily right-skewed
+    values = values[values > 0]
+    low, high = (values.min(), values.max()) if len(values) else (1, 10)
+    if high <= low:
+        high = low * 10
+    return np.logspace(np.log10(low), np.log10(high), bins + 1)
+
+
+def density_grid(x, y, bins=DENSITY_BINS):
+    x_edges = _log_edges(x, bins)
+    y_edges = _log_edges(y, bins)
+    counts, _, _ = np.histogram2d(np.clip(x, x_edges[0], x_edges[-1]), np.clip(y, y_edges[0], y_edges[-1]),
+                                  bins=[x_edges, y_edges])
+    return counts.T, x_edges, y_edges
+
+
+def outlier_mask(x, y, tail=OUTLIER_TAIL, max_outliers=MAX_OUTLIERS):
+    # points in the extreme tails of either axis, with the tails narrowed so
+    # roughly no more than max_outliers points are kept
+    tail = min(tail, max_outliers / (4 * max(len(x), 1)))
+    x_low, x_high = np.quantile(x, [tail, 1 - tail])
+    y_low, y_high = np.quantile(y, [tail, 1 - tail])
+    return (x < x_low) | (x > x_high) | (y < y_low) | (y > y_high)
+
+
+def build_scatter(df, x, y, color, labels, title):
+    mode = scatter_mode(len(df))
+    if mode != "density":
+        import plotly.express as px
+
+        return px.scatter(df, x=x, y=y, color=color, labels=labels, title=title, render_mode=mode)
+
+    x_values = df[x].to_numpy(dtype="float64")
+    y_values = df[y].to_numpy(dtype="float64")
+    counts, x_edges, y_edges = density_grid(x_values, y_values)
+
+    # density of all points, empty cells left transparent
+    fig = go.Figure(go.Heatmap(
+        z=np.where(counts > 0, counts, np.nan), x=x_edges, y=y_edges,
+        colorscale="Greys", showscale=False, name="Projects",
+        hovertemplate="{}: %{{x:.2s}}<br>{}: %{{y:.2s}}<br>Projects: %{{z}}<extra></extra>"
+        .format(labels.get(x, x), labels.get(y, y))))
+
+    # outliers stay individual points, one WebGL trace per category
+    mask = outlier_mask(x_values, y_values)
+    categories = df[color].to_numpy()
+    colors = category_colors(df[color].cat.categories if hasattr(df[color], "cat") else np.unique(categories))
+    for category, category_color in colors.items():
+        selected = mask & (categories == category)
+        if selected.any():
+            fig.add_trace(go.Scattergl(x=x_values[selected], y=y_values[selected], mode="markers",
+                                       name=str(category), legendgroup=str(category),
+                                       marker=dict(color=category_color)))
+
+    fig.update_layout(title=title, legend_title_text=labels.get(color, color))
+    fig.update_xaxes(type="log")
+    fig.update_yaxes(type="log")
+    return fig
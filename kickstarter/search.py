@@ -0,0 +1,169 @@
+import bisect
+import os
+import re
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from kickstarter.data import CACHED_PARTITIONS
+from kickstarter.storage import read_columns, read_rows
+
+
+# searchable text columns and how much a match in each counts towards the rank
+SEARCH_FIELDS = {'name': 3.0, 'creator_name': 2.0, 'category_name': 1.5, 'blurb': 1.0}
+
+# columns shown next to each match
+RESULT_COLUMNS = ['name', 'creator_name', 'category_name', 'converted_pledged_amount', 'goal',
+                  'static_usd_rate', 'backers_count', 'project_url']
+
+# longer tokens (urls, hashes) are left out so the vocabulary stays compact
+MAX_TOKEN_LENGTH = 24
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# bump whenever the saved index changes, so indexes built by older code are rebuilt
+INDEX_VERSION = 3
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if len(token) <= MAX_TOKEN_LENGTH]
+
+
+def index_path(file):
+    # the index ships next to the columnar partition it was built from
+    return '{}.search-v{}.npz'.format(os.path.splitext(file)[0], INDEX_VERSION)
+
+
+class SearchIndex:
+    """Inverted index over the text columns of one columnar file.
+
+    Terms are kept sorted by their UTF-8 bytes and stored as one byte blob
+    with offsets, so a term or every term sharing a prefix is a contiguous
+    range found by binary search over the blob; the postings of that range are
+    one contiguous slice of the `documents` and `weights` arrays (CSR layout).
+    Documents are row positions in the file, weights the weight of the best
+    field the term appears in, however often it appears there.
+    """
+
+    def __init__(self, terms, term_offsets, offsets, documents, weights, pledged):
+        self.terms = terms
+        self.term_offsets = term_offsets
+        self.offsets = offsets
+        self.documents = documents
+        self.weights = weights
+        self.pledged = pledged
+
+    @classmethod
+    def build(cls, df):
+        # one (term, row, weight) posting per token occurrence, heaviest field first
+        terms, documents, weights = [], [], []
+        for field, weight in sorted(SEARCH_FIELDS.items(), key=lambda item: -item[1]):
+            tokens = df[field].fillna('').astype(str).str.lower().str.findall(TOKEN_PATTERN).explode().dropna()
+            tokens = tokens[tokens.str.len() <= MAX_TOKEN_LENGTH]
+            terms.append(tokens.to_numpy(dtype=object))
+            documents.append(tokens.index.to_numpy(dtype='int64'))
+            weights.append(np.full(len(tokens), weight, dtype='float32'))
+
+        # number the terms in sorted order, then keep one posting per (term, row) on integer keys;
+        # the first occurrence of a key comes from its heaviest field, so a blurb repeating
+        # a word never outranks a match in the name
+        codes, uniques = pd.factorize(np.concatenate(terms))
+        encoded = np.array([term.encode() for term in uniques], dtype=object)
+        order = np.argsort(encoded, kind='stable')
+        encoded, codes = encoded[order], np.argsort(order)[codes]
+        lengths = np.fromiter(map(len, encoded), dtype='int64', count=len(encoded))
+        term_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype('int32')
+        terms_blob = np.frombuffer(b''.join(encoded), dtype='uint8')
+        keys = codes.astype('int64') * len(df) + np.concatenate(documents)
+        keys, first = np.unique(keys, return_index=True)
+        best = np.concatenate(weights)[first]
+
+        counts = np.bincount(keys // max(len(df), 1), minlength=len(encoded))
+        offsets = np.concatenate([[0], np.cumsum(counts)]).astype('int64')
+        return cls(terms_blob, term_offsets, offsets, (keys % max(len(df), 1)).astype('int32'), best,
+                   df['converted_pledged_amount'].to_numpy(dtype='float64'))
+
+    def save(self, path):
+        tmp_path = '{}.{}.tmp.npz'.format(os.path.splitext(path)[0], os.getpid())
+        np.savez(tmp_path, terms=self.terms, term_offsets=self.term_offsets, offsets=self.offsets, documents=self.documents,
+                 weights=self.weights, pledged=self.pledged)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(**{name: arrays[name] for name in arrays.files})
+
+    def __len__(self):
+        # number of distinct terms
+        return len(self.term_offsets) - 1
+
+    def _term(self, i):
+        return self.terms[self.term_offsets[i]:self.term_offsets[i + 1]].tobytes()
+
+    def _term_range(self, token, prefix):
+        token = token.encode()
+        low = bisect.bisect_left(range(len(self)), token, key=self._term)
+        if prefix:
+            # 0xff never occurs in UTF-8, so it sorts after every term starting with token
+            high = bisect.bisect_left(range(len(self)), token + b'\xff', lo=low, key=self._term)
+        else:
+            high = low + 1 if low < len(self) and self._term(low) == token else low
+        return self.offsets[low], self.offsets[high]
+
+    def search(self, query, prefix=True, limit=50):
+        # rows matching every query token (the last one as a prefix when prefix is set),
+        # ranked by summed field weights, ties broken by pledged amount
+        tokens = tokenize(query)
+        documents, scores = None, None
+        for i, token in enumerate(tokens):
+            start, stop = self._term_range(token, prefix and i == len(tokens) - 1)
+            # a prefix can match several terms of the same row, keep its best one
+            matched, inverse = np.unique(self.documents[start:stop], return_inverse=True)
+            best = np.zeros(len(matched), dtype='float32')
+            np.maximum.at(best, inverse, self.weights[start:stop])
+
+            if documents is None:
+                documents, scores = matched, best
+            else:
+                documents, left, right = np.intersect1d(documents, matched, assume_unique=True, return_indices=True)
+                scores = scores[left] + best[right]
+            if not len(documents):
+                break
+
+        if documents is None:
+            return np.empty(0, dtype='int32'), np.empty(0, dtype='float32'), 0
+        order = np.lexsort((-self.pledged[documents], -scores))[:limit]
+        return documents[order], scores[order], len(documents)
+
+
+# one index per columnar file, read from disk when it was built before
+@st.cache_resource(show_spinner=False, max_entries=CACHED_PARTITIONS)
+def load_search_index(file):
+    path = index_path(file)
+    if os.path.exists(path):
+        return SearchIndex.load(path)
+    index = SearchIndex.build(read_columns(file, list(SEARCH_FIELDS) + ['converted_pledged_amount']))
+    index.save(path)
+    return index
+
+
+@st.cache_data(show_spinner=False, max_entries=1000)
+def search_projects(query, prefix=True, limit=50, *, file):
+    # ranked matches with their pledged/goal/backers figures, and the total number of matches
+    rows, scores, total = load_search_index(file).search(query, prefix, limit)
+    df = read_rows(file, RESULT_COLUMNS, rows)
+    goal_usd = df['goal'] * df['static_usd_rate']
+    results = pd.DataFrame({
+        'Project': df['name'].to_numpy(),
+        'Creator': df['creator_name'].to_numpy(),
+        'Category': df['category_name'].to_numpy(),
+        'Pledged (USD)': df['converted_pledged_amount'].to_numpy(),
+        'Goal (USD)': goal_usd.round().to_numpy(),
+        '% of goal': (df['converted_pledged_amount'] / goal_usd * 100).round().to_numpy(),
+        'Backers': df['backers_count'].to_numpy(),
+        'Link': df['project_url'].to_numpy(),
+        'Score': scores,
+    })
+    return results, total
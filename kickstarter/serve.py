@@ -0,0 +1,170 @@
+"""Start the Streamlit server with every page warmed up first.
+
+The dataset and its time series history are ingested and the data and
+figures every page shows with its default widget values are computed for the
+default country before the server starts listening, so the health check only
+passes once the first visitor can be served from warm caches. Startup timings
+are printed and appended to the timing log. Run from the repository root,
+with any `streamlit run` options:
+
+    python -m kickstarter.serve --server.port 8501
+"""
+import time
+
+STARTED = time.perf_counter()
+
+import glob  # noqa: E402
+import json  # noqa: E402
+import logging  # noqa: E402
+import os  # noqa: E402
+import sys  # noqa: E402
+
+from kickstarter.instrumentation import TIMING_LOG  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN_SCRIPT = os.path.join(ROOT, 'Main.py')
+
+logger = logging.getLogger(__name__)
+
+
+def pages():
+    return [MAIN_SCRIPT] + sorted(glob.glob(os.path.join(ROOT, 'pages', '*.py')))
+
+
+def _warm_main(country, file):
+    # Main.py with every category selected and both sliders at their full range
+    from kickstarter.aggregates import load_state_category_cube, state_totals
+    from kickstarter.figures import state_choropleth
+
+    cube = load_state_category_cube(file)
+    categories = tuple(sorted(cube.index.get_level_values('category_parent_name').unique()))
+    grouped_df = state_totals(file, categories)
+    if country != 'US' or grouped_df.empty:
+        return
+
+    min_pledged, max_pledged = int(grouped_df['total_pledged'].min()), int(grouped_df['total_pledged'].max())
+    min_count, max_count = int(grouped_df['count'].min()), int(grouped_df['count'].max())
+    pledged_range = (min_pledged, max_pledged) if max_pledged > min_pledged else None
+    count_range = (min_count, max_count) if max_count > min_count else None
+    state_choropleth(categories, pledged_range=pledged_range, metric='total_pledged', file=file)
+    state_choropleth(categories, pledged_range=pledged_range, count_range=count_range, metric='count', file=file)
+
+
+def _warm_distribution(country, file):
+    # every category selected, the full pledged range and linear bins
+    from kickstarter.distribution import load_pledged_distribution
+    from kickstarter.figures import category_bar, pledged_histogram
+
+    distribution = load_pledged_distribution(file)
+    categories = tuple(sorted(distribution.sorted_values))
+    min_pledged, max_pledged = map(int, distribution.value_bounds(categories))
+    value_range = (min_pledged, max_pledged) if max_pledged > min_pledged else None
+    pledged_histogram(categories, value_range, False, file=file)
+    category_bar(categories, file=file)
+
+
+def _warm_goal(country, file):
+    from kickstarter.aggregates import category_goals
+    from kickstarter.data import load_comparison_projects
+    from kickstarter.figures import projects_scatter
+
+    category_goals(file)
+    if load_comparison_projects(file).empty:
+        return
+    for y in ('goal', 'backers_count'):
+        projects_scatter(y, file=file)
+
+
+def _warm_takeaways(country, file):
+    from kickstarter.insights import load_insights
+
+    load_insights(file)
+
+
+def _warm_time_trends(country, file):
+    # every category, monthly buckets of pledged money by launch date over a 12 month window
+    from kickstarter.timeseries import get_time_series_store, load_rolling_totals
+
+    monthly, ingested = get_time_series_store().current
+    if country not in monthly.index.get_level_values('location_country'):
+        return
+    categories = tuple(sorted(monthly.xs(country, level='location_country')
+                              .index.get_level_values('category_parent_name').unique()))
+    load_rolling_totals(ingested, country, 'launched_at', 'M', 'pledged_sum', categories, 12, _monthly=monthly)
+
+
+def _warm_search(country, file):
+    from kickstarter.search import load_search_index
+
+    load_search_index(file)
+
+
+# what each page computes with its default widget values, keyed by script name
+WARM_UPS = {
+    'Main.py': _warm_main,
+    '02_Pledged_Distribution_&_Category_Analysis.py': _warm_distribution,
+    '03_Pledged_vs_Goal_&_Backers.py': _warm_goal,
+    '04_Takeaways.py': _warm_takeaways,
+    '05_Time_Trends.py': _warm_time_trends,
+    '06_Project_Search.py': _warm_search,
+}
+
+
+def warm_up():
+    # ingest the active snapshot, then fill what every page needs for the default country
+    # with its default widget values; returns (stage, seconds) pairs
+    from kickstarter.snapshots import default_country, get_registry, ingest_history
+
+    timings = [('imports', time.perf_counter() - STARTED)]
+
+    started = time.perf_counter()
+    registry = get_registry()
+    dataset = registry.active
+    timings.append(('dataset', time.perf_counter() - started))
+
+    # the watcher ingests the history in the background too; waiting for it here keeps the
+    # server from reporting healthy while Time Trends still shows its notice
+    started = time.perf_counter()
+    ingest_history(registry.data_dir, registry.pattern)
+    timings.append(('time series', time.perf_counter() - started))
+
+    country = default_country(dataset)
+    file = dataset.partition(country)
+    for path in pages():
+        page = os.path.basename(path)
+        if page not in WARM_UPS:
+            continue
+        started = time.perf_counter()
+        try:
+            WARM_UPS[page](country, file)
+        except Exception:
+            # a broken page shouldn't keep the others from being served
+            logger.exception('Warm-up of %s failed', page)
+        timings.append(('warm-up: ' + page, time.perf_counter() - started))
+
+    timings.append(('total', time.perf_counter() - STARTED))
+    return timings
+
+
+def log_startup(timings):
+    timestamp = time.time()
+    with open(TIMING_LOG, 'a') as f:
+        for stage, seconds in timings:
+            f.write(json.dumps({'ts': timestamp, 'page': 'startup', 'run_id': None, 'stage': stage,
+                                'seconds': seconds, 'rows': None, 'payload_bytes': None, 'peak_mb': None}) + '\n')
+    for stage, seconds in timings:
+        print('{:<40} {:>8.2f} s'.format(stage, seconds))
+
+
+def main(args):
+    log_startup(warm_up())
+
+    from streamlit.web import cli
+
+    # the server runs in this process, so it starts with the caches warm-up filled
+    sys.argv = ['streamlit', 'run', MAIN_SCRIPT] + args
+    sys.exit(cli.main())
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,205 @@
+import fnmatch
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+import streamlit as st
+
+from kickstarter.data import DATA_FILE, DEFAULT_COUNTRY
+from kickstarter.instrumentation import rerun_timer
+from kickstarter.storage import columnar_path, partition_counts, partition_path, source_fingerprint
+
+
+# directory watched for new snapshots, defaults to the directory of DATA_FILE
+DATA_DIR = os.environ.get('KICKSTARTER_DATA_DIR', os.path.dirname(DATA_FILE) or '.')
+
+# snapshot file names in DATA_DIR; without KICKSTARTER_DATA_DIR only DATA_FILE itself is watched
+SNAPSHOT_PATTERN = os.environ.get('KICKSTARTER_SNAPSHOT_PATTERN',
+                                  '*.csv' if 'KICKSTARTER_DATA_DIR' in os.environ else os.path.basename(DATA_FILE))
+
+# seconds between two scans of DATA_DIR; 0 turns the watcher off, so neither new
+# snapshots nor the time series history are picked up
+POLL_SECONDS = float(os.environ.get('KICKSTARTER_POLL_SECONDS', 30))
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DatasetVersion:
+    # columnar cache file named after the content hash, so each version gets its own
+    # partitions and cache entries
+    file: str
+    source: str
+    fingerprint: str
+    loaded_at: float
+    # location_country partitions, largest first
+    countries: tuple
+
+    def partition(self, country):
+        # path every loader is called with for one country
+        return partition_path(self.file, country)
+
+    @property
+    def label(self):
+        return '{} ({}, loaded {})'.format(os.path.basename(self.source), self.fingerprint[:8],
+                                          time.strftime('%Y-%m-%d %H:%M UTC', time.gmtime(self.loaded_at)))
+
+
+def snapshot_history(data_dir=DATA_DIR, pattern=SNAPSHOT_PATTERN):
+    # snapshots in the data directory, oldest first
+    paths = [os.path.join(data_dir, name) for name in os.listdir(data_dir) if fnmatch.fnmatch(name, pattern)]
+    return sorted((path for path in paths if os.path.isfile(path)), key=os.path.getmtime)
+
+
+def latest_snapshot(data_dir=DATA_DIR, pattern=SNAPSHOT_PATTERN):
+    # most recently modified snapshot in the data directory
+    history = snapshot_history(data_dir, pattern)
+    return history[-1] if history else None
+
+
+def ingest_history(data_dir=DATA_DIR, pattern=SNAPSHOT_PATTERN):
+    # fold every snapshot not seen yet into the time series, in the order they appeared
+    from kickstarter.timeseries import get_time_series_store
+
+    store = get_time_series_store()
+    for source in snapshot_history(data_dir, pattern):
+        store.ingest(source)
+
+
+def prepare_main(partition):
+    # what Main.py reads for a partition
+    from kickstarter.aggregates import load_state_category_cube, state_totals
+    from kickstarter.data import load_projects
+
+    load_projects(partition)
+    load_state_category_cube(partition)
+    state_totals(partition)
+
+
+def prepare_pages(partition):
+    # what the other pages read for a partition, the search index being the slowest
+    from kickstarter.aggregates import category_totals
+    from kickstarter.data import load_comparison_projects
+    from kickstarter.distribution import load_pledged_distribution
+    from kickstarter.insights import load_insights
+    from kickstarter.search import load_search_index
+    from kickstarter.trendlines import load_trendlines
+
+    category_totals(partition)
+    load_pledged_distribution(partition)
+    load_comparison_projects(partition)
+    for y in ('goal', 'backers_count'):
+        load_trendlines(y, partition)
+    load_search_index(partition)
+    load_insights(partition)
+
+
+def prepare_version(source, pages=True):
+    # ingest a snapshot and precompute what Main.py and, with pages, every other page
+    # needs, before anyone can see it
+    file = columnar_path(source)
+    version = DatasetVersion(file=file, source=source, fingerprint=source_fingerprint(source),
+                             loaded_at=time.time(), countries=tuple(partition_counts(file)))
+
+    # only the default partition is warmed, other countries load on first selection
+    partition = version.partition(default_country(version))
+    prepare_main(partition)
+    if pages:
+        prepare_pages(partition)
+    return version
+
+
+def default_country(version):
+    return DEFAULT_COUNTRY if DEFAULT_COUNTRY in version.countries else version.countries[0]
+
+
+class SnapshotRegistry:
+    """The active dataset version, refreshed by a background watcher thread.
+
+    A rerun reads `active` once and keeps that version until it finishes;
+    a new snapshot is ingested and precomputed on the watcher thread and
+    only then swapped in with a single reference assignment. The first
+    version only prepares what Main.py needs before the first rerun, the
+    watcher prepares the other pages' data in the background.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, pattern=SNAPSHOT_PATTERN, poll_seconds=POLL_SECONDS):
+        self.data_dir = data_dir
+        self.pattern = pattern
+        self.poll_seconds = poll_seconds
+        self.active = prepare_version(latest_snapshot(data_dir, pattern) or DATA_FILE, pages=False)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def refresh(self):
+        ingest_history(self.data_dir, self.pattern)
+        source = latest_snapshot(self.data_dir, self.pattern)
+        if source is None or (source == self.active.source
+                              and source_fingerprint(source) == self.active.fingerprint):
+            return False
+        version = prepare_version(source)
+        if version.fingerprint == self.active.fingerprint:
+            return False
+        self.active = version
+        logger.info('Activated dataset snapshot %s', version.label)
+        return True
+
+    def _watch(self):
+        try:
+            prepare_pages(self.active.partition(default_country(self.active)))
+        except Exception:
+            # a page that can't be prepared now builds its data on first visit instead
+            logger.exception('Failed to prepare the pages of the active snapshot')
+
+        # history missing from the time series is caught up here rather than in a rerun
+        wait = 0
+        while not self._stopped.wait(wait):
+            try:
+                self.refresh()
+            except Exception:
+                # a half-written or broken snapshot keeps the current version active
+                logger.exception('Failed to refresh dataset snapshot')
+            wait = self.poll_seconds
+
+    def start(self):
+        if self._thread is None and self.poll_seconds > 0:
+            self._thread = threading.Thread(target=self._watch, name='snapshot-watcher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+
+
+# one registry and watcher thread per process
+@st.cache_resource(show_spinner=False)
+def get_registry():
+    return SnapshotRegistry().start()
+
+
+def current_dataset():
+    return get_registry().active
+
+
+def country_selector(dataset):
+    # sidebar country picker shared by every page, the choice survives switching pages
+    if st.session_state.get('country') not in dataset.countries:
+        st.session_state['country'] = default_country(dataset)
+    st.session_state['country'] = st.session_state['country']
+    return st.sidebar.selectbox('Country', dataset.countries, key='country')
+
+
+def page_context(page):
+    # the header of every page: a rerun timer (its breakdown is shown in the sidebar when
+    # KICKSTARTER_PROFILE is set), the dataset version used for the whole rerun, the country
+    # picked in the sidebar with its partition, and the title over the snapshot shown;
+    # a newer snapshot is only picked up by the next rerun
+    timer = rerun_timer(page)
+    dataset = current_dataset()
+    country = country_selector(dataset)
+    file = dataset.partition(country)
+    st.title('Most Funded {} Projects on Kickstarter'.format(country))
+    st.caption('Snapshot: {}'.format(dataset.label))
+    return timer, dataset, country, file
@@ -0,0 +1,150 @@
+import contextlib
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+
+# where converted columnar files are kept, shared by every server process on the host
+CACHE_DIR = os.environ.get('KICKSTARTER_CACHE_DIR', '.cache')
+
+# rows split into country partitions at a time
+PARTITION_BATCH_ROWS = 65_536
+
+# schema metadata key holding the categories of the columns write_frame stores as codes
+CATEGORIES_KEY = b'kickstarter.categories'
+
+
+def source_fingerprint(file):
+    # content hash of the source file; the hash is remembered next to the cache
+    # and only recomputed when the file's size or mtime changes
+    stat = os.stat(file)
+    stamp_path = os.path.join(CACHE_DIR, os.path.basename(file) + '.json')
+    try:
+        with open(stamp_path) as f:
+            stamp = json.load(f)
+        if stamp['size'] == stat.st_size and stamp['mtime_ns'] == stat.st_mtime_ns:
+            return stamp['sha256']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    digest = hashlib.sha256()
+    with open(file, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    fingerprint = digest.hexdigest()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    _atomic_write_text(stamp_path, json.dumps({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                               'sha256': fingerprint}))
+    return fingerprint
+
+
+def _atomic_write_text(path, text):
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def columnar_path(file):
+    # convert the csv once into an uncompressed Arrow file named after its content hash,
+    # so a changed source gets a new file and stale ones are never read
+    if file.endswith('.arrow'):
+        return file
+    stem = os.path.splitext(os.path.basename(file))[0]
+    path = os.path.join(CACHE_DIR, '{}.{}.arrow'.format(stem, source_fingerprint(file)[:16]))
+    if not os.path.exists(path):
+        table = pa.Table.from_pandas(pd.read_csv(file), preserve_index=False)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+    return path
+
+
+def partition_counts(file):
+    # rows per location_country, largest partition first; the partitions are
+    # written next to the columnar file on first use
+    manifest_path = columnar_path(file)[:-len('.arrow')] + '.countries.json'
+    if not os.path.exists(manifest_path):
+        # split the mapped table in Arrow one record batch at a time, so only a batch's
+        # rows are ever copied, however large the snapshot
+        table = feather.read_table(columnar_path(file), memory_map=True)
+        counts = {}
+        with contextlib.ExitStack() as stack:
+            writers = {}
+            for batch in table.to_batches(max_chunksize=PARTITION_BATCH_ROWS):
+                countries = batch.column('location_country')
+                for country in pc.unique(countries).drop_null().to_pylist():
+                    if country not in writers:
+                        tmp_path = '{}.{}.tmp'.format(partition_path(file, country), os.getpid())
+                        writers[country] = stack.enter_context(pa.ipc.new_file(tmp_path, table.schema))
+                        counts[country] = 0
+                    partition = batch.filter(pc.equal(countries, country))
+                    writers[country].write_batch(partition)
+                    counts[country] += partition.num_rows
+        for country in counts:
+            path = partition_path(file, country)
+            os.replace('{}.{}.tmp'.format(path, os.getpid()), path)
+        _atomic_write_text(manifest_path, json.dumps(counts))
+    with open(manifest_path) as f:
+        counts = json.load(f)
+    return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+
+def partition_path(file, country):
+    # Arrow file holding the projects of one location_country
+    return '{}.country={}.arrow'.format(columnar_path(file)[:-len('.arrow')], country)
+
+
+def read_columns(file, columns, memory_map=True):
+    # read only the requested columns, converted to a regular pandas frame
+    table = feather.read_table(columnar_path(file), columns=columns, memory_map=memory_map)
+    return table.to_pandas(split_blocks=True)
+
+
+def read_rows(file, columns, rows):
+    # a handful of rows by position, only those rows are converted to pandas
+    table = feather.read_table(columnar_path(file), columns=columns, memory_map=True)
+    return table.take(pa.array(rows, type=pa.int64())).to_pandas()
+
+
+def write_frame(df, path):
+    # store a prepared frame so read_frame can map it back without copying: categoricals
+    # as their codes with the categories in the schema metadata, every column in one chunk
+    columns, categories = {}, {}
+    for column in df.columns:
+        series = df[column]
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            columns[column] = series.cat.codes.to_numpy()
+            categories[column] = (series.cat.categories.tolist(), str(series.cat.categories.dtype))
+        else:
+            columns[column] = series.to_numpy()
+    table = pa.table(columns).replace_schema_metadata({CATEGORIES_KEY: json.dumps(categories)})
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    feather.write_feather(table, tmp_path, compression='uncompressed', chunksize=max(len(df), 1))
+    os.replace(tmp_path, path)
+
+
+def read_frame(path):
+    # a frame written by write_frame whose columns are read-only views of the memory-mapped
+    # file, so processes on one host share its pages instead of each holding a copy
+    table = feather.read_table(path, memory_map=True)
+    categories = json.loads(table.schema.metadata[CATEGORIES_KEY])
+    columns = {}
+    for field, column in zip(table.schema, table.columns):
+        if column.num_chunks:
+            values = column.chunk(0).to_numpy(zero_copy_only=True)
+        else:
+            values = np.empty(0, dtype=field.type.to_pandas_dtype())
+        if field.name in categories:
+            names, dtype = categories[field.name]
+            values = pd.Categorical.from_codes(values, categories=pd.Index(names, dtype=dtype))
+        columns[field.name] = values
+    # copy=False also keeps pandas from consolidating same-typed columns into a new block
+    return pd.DataFrame(columns, copy=False)
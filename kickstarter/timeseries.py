@@ -0,0 +1,182 @@
+import os
+import pickle
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from kickstarter.aggregates import CACHED_SELECTIONS
+from kickstarter.data import COLUMNS
+from kickstarter.storage import CACHE_DIR, read_columns, source_fingerprint
+
+
+# epoch columns a project can be bucketed by
+TIME_COLUMNS = ['launched_at', 'deadline']
+
+# incremental aggregates survive restarts here, so history is never re-ingested: the monthly
+# sums are rewritten on every ingest, the projects it changed are appended as one Arrow file
+TIME_SERIES_DIR = os.path.join(CACHE_DIR, 'timeseries')
+
+# per-project values whose change makes a project count as changed
+_TRACKED_COLUMNS = ['location_country', 'category_parent_name', 'location_state',
+                    'pledged_usd', 'backers_count'] + TIME_COLUMNS
+
+# bumped whenever the stored layout changes, an older store on disk is rebuilt
+SCHEMA_VERSION = 3
+
+
+def _snapshot_rows(file):
+    # projects of one snapshot, indexed by id, with their month buckets
+    df = read_columns(file, COLUMNS + TIME_COLUMNS)
+    df = df.drop_duplicates('id', keep='last').set_index('id')
+    df = df.rename(columns={'converted_pledged_amount': 'pledged_usd'})
+    df['category_parent_name'] = df['category_parent_name'].fillna('Other').astype(str)
+    # missing values become empty strings, NaN would never compare equal and drops out of groupby
+    for column in ['location_country', 'location_state']:
+        df[column] = df[column].fillna('').astype(str)
+    for column in TIME_COLUMNS:
+        df[column] = pd.to_datetime(df[column], unit='s').dt.to_period('M')
+    return df[_TRACKED_COLUMNS]
+
+
+def _contributions(rows):
+    # what a set of projects adds to the (basis, month, country, category, state) sums
+    parts = {}
+    for basis in TIME_COLUMNS:
+        parts[basis] = rows.groupby([basis, 'location_country', 'category_parent_name', 'location_state']).agg(
+            pledged_sum=('pledged_usd', 'sum'),
+            project_count=('pledged_usd', 'size'),
+            backers_sum=('backers_count', 'sum'))
+        parts[basis].index.names = ['month', 'location_country', 'category_parent_name', 'location_state']
+    return pd.concat(parts, names=['basis'])
+
+
+class TimeSeriesStore:
+    """Monthly pledged, project and backer sums built up snapshot by snapshot.
+
+    Every project is remembered by id with the values it last contributed, in
+    append-only segments: one frame, and one Arrow file, per ingest holding
+    the projects it added or changed, plus a map from id to the segment with
+    its latest values. Ingesting a snapshot only aggregates its new and
+    changed projects: their old contributions are subtracted from the sums
+    and the new ones added. Only the sums and the new segment are written, so
+    the cost follows the snapshot and its delta, not the history.
+    """
+
+    def __init__(self, path=TIME_SERIES_DIR):
+        self.path = path
+        self.schema = SCHEMA_VERSION
+        # frames indexed by id, oldest first, and the file names they are stored in
+        self.segments = []
+        self.segment_files = []
+        # id -> position in segments of the project's latest values
+        self.latest = {}
+        empty = pd.DataFrame(columns=_TRACKED_COLUMNS, index=pd.Index([], name='id', dtype='int64'))
+        # (monthly sums, ingested fingerprints), replaced as one reference so readers never see half an update
+        self.current = (_contributions(empty.astype({'pledged_usd': 'float64', 'backers_count': 'int64'})), ())
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=TIME_SERIES_DIR):
+        store = cls(path)
+        try:
+            with open(os.path.join(path, 'monthly.pickle'), 'rb') as f:
+                state = pickle.load(f)
+            if state['schema'] != SCHEMA_VERSION:
+                return store
+            segments = [pd.read_feather(os.path.join(path, name)).set_index('id') for name in state['segments']]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError):
+            return store
+        for position, segment in enumerate(segments):
+            store._add_segment(segment, state['segments'][position])
+        store.current = state['current']
+        return store
+
+    def _add_segment(self, segment, name):
+        self.latest.update(dict.fromkeys(segment.index.tolist(), len(self.segments)))
+        self.segments.append(segment)
+        self.segment_files.append(name)
+
+    def _write_segment(self, segment, name):
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, name)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        segment.reset_index().to_feather(tmp_path)
+        os.replace(tmp_path, path)
+
+    def save(self):
+        # the sums and the list of segments; segments themselves are written once, when ingested
+        os.makedirs(self.path, exist_ok=True)
+        path = os.path.join(self.path, 'monthly.pickle')
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'schema': SCHEMA_VERSION, 'current': self.current, 'segments': self.segment_files}, f)
+        os.replace(tmp_path, path)
+
+    def known(self, ids):
+        # latest stored values of the given projects, all-NaN rows for projects never seen
+        positions = np.fromiter((self.latest.get(i, -1) for i in ids.tolist()), dtype='int64', count=len(ids))
+        parts = [self.segments[position].loc[ids[positions == position]]
+                 for position in np.unique(positions[positions >= 0])]
+        if not parts:
+            return pd.DataFrame(index=ids, columns=_TRACKED_COLUMNS)
+        return pd.concat(parts).reindex(ids)
+
+    def ingest(self, file):
+        # fold one snapshot into the sums; returns the number of new or changed projects
+        fingerprint = source_fingerprint(file)
+        with self._lock:
+            monthly, ingested = self.current
+            if fingerprint in ingested:
+                return 0
+
+            rows = _snapshot_rows(file)
+            known = self.known(rows.index)
+            changed = (known != rows).any(axis=1)
+            new_rows = rows[changed]
+            old_rows = known[changed].dropna(how='all').astype(rows.dtypes.to_dict())
+
+            delta = _contributions(new_rows).sub(_contributions(old_rows), fill_value=0)
+            monthly = monthly.add(delta, fill_value=0)
+            monthly = monthly[monthly['project_count'] > 0].astype({'project_count': 'int64', 'backers_sum': 'int64'})
+
+            if len(new_rows):
+                name = '{:06d}-{}.arrow'.format(len(self.segments), fingerprint[:16])
+                self._write_segment(new_rows, name)
+                self._add_segment(new_rows, name)
+            self.current = (monthly.sort_index(), ingested + (fingerprint,))
+            self.save()
+            return len(new_rows)
+
+
+# one store per process, loaded from disk so only unseen snapshots are ingested
+@st.cache_resource(show_spinner=False)
+def get_time_series_store():
+    return TimeSeriesStore.load()
+
+
+def rolling_totals(monthly, country, basis='launched_at', freq='M', metric='pledged_sum', categories=(), window=12):
+    # rolling sums of one metric per category over consecutive months or quarters
+    df = monthly.xs((basis, country), level=('basis', 'location_country'))
+    if categories:
+        df = df[df.index.get_level_values('category_parent_name').isin(categories)]
+
+    periods = df.index.get_level_values('month')
+    if freq == 'Q':
+        periods = periods.asfreq('Q')
+    wide = df[metric].groupby([periods, df.index.get_level_values('category_parent_name')]).sum().unstack(fill_value=0)
+
+    if wide.empty:
+        return wide
+    # buckets without any projects count as zero, so the window spans calendar time
+    wide = wide.reindex(pd.period_range(wide.index.min(), wide.index.max(), freq=freq), fill_value=0)
+    return wide.rolling(window, min_periods=1).sum()
+
+
+# rolling totals per time series version and filter combination, shared read-only by every
+# session; the ingested fingerprints identify the monthly sums, which aren't hashed
+@st.cache_resource(show_spinner=False, max_entries=CACHED_SELECTIONS)
+def load_rolling_totals(ingested, country, basis='launched_at', freq='M', metric='pledged_sum', categories=(), window=12,
+                        _monthly=None):
+    return rolling_totals(_monthly, country, basis, freq, metric, categories, window)
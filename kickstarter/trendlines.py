@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from kickstarter.data import CACHED_PARTITIONS, load_comparison_projects
+from kickstarter.scatter import category_colors
+
+
+# points each trendline is sampled at on log/log axes
+TRENDLINE_POINTS = 50
+
+
+def fit_ols(df, x, y, by):
+    # closed-form simple least squares for every group in one grouped pass
+    frame = pd.DataFrame({
+        "group": df[by],
+        "x": df[x].astype("float64"),
+        "y": df[y].astype("float64"),
+    })
+    frame["xx"] = frame["x"] * frame["x"]
+    frame["xy"] = frame["x"] * frame["y"]
+    frame["yy"] = frame["y"] * frame["y"]
+    # smallest positive x, where a trendline on a log axis can start
+    frame["x_positive"] = frame["x"].where(frame["x"] > 0)
+
+    sums = frame.groupby("group", observed=True).agg(
+        n=("x", "size"), sx=("x", "sum"), sy=("y", "sum"), sxx=("xx", "sum"), sxy=("xy", "sum"),
+        syy=("yy", "sum"), x_min=("x", "min"), x_max=("x", "max"), x_min_positive=("x_positive", "min"))
+
+    # centered sums of squares and cross products
+    ssx = sums["sxx"] - sums["sx"] ** 2 / sums["n"]
+    ssy = sums["syy"] - sums["sy"] ** 2 / sums["n"]
+    sxy = sums["sxy"] - sums["sx"] * sums["sy"] / sums["n"]
+
+    fits = pd.DataFrame(index=sums.index.rename(by))
+    fits["n"] = sums["n"]
+    fits["slope"] = sxy / ssx.where(ssx > 0)
+    fits["intercept"] = (sums["sy"] - fits["slope"] * sums["sx"]) / sums["n"]
+    fits["r_squared"] = sxy ** 2 / (ssx * ssy).where(ssx * ssy > 0)
+    fits["x_min"] = sums["x_min"]
+    fits["x_max"] = sums["x_max"]
+    fits["x_min_positive"] = sums["x_min_positive"]
+    return fits
+
+
+# per-category fits of y on pledged_usd, computed once per dataset
+@st.cache_resource(show_spinner=False, max_entries=2 * CACHED_PARTITIONS)
+def load_trendlines(y, file):
+    df = load_comparison_projects(file)
+    return fit_ols(df, "pledged_usd", y, "category_parent_name")
+
+
+def _trendline_x(fit, log_axes):
+    # a straight line needs two points, on log/log axes y = a + b*x is curved
+    # unless a is 0, so it is sampled at log-spaced x values instead
+    if not log_axes:
+        return np.array([fit["x_min"], fit["x_max"]])
+    if not fit["x_max"] > 0:
+        return np.empty(0)
+    return np.logspace(np.log10(fit["x_min_positive"]), np.log10(fit["x_max"]), TRENDLINE_POINTS)
+
+
+def add_trendlines(fig, fits, x_label, y_label):
+    # attach one line per category, colored like its scatter trace
+    log_axes = fig.layout.xaxis.type == "log"
+    colors = category_colors(fits.index)
+    colors.update({trace.name: trace.marker.color for trace in fig.data if trace.name in colors})
+    for category, fit in fits.dropna(subset=["slope"]).iterrows():
+        x = _trendline_x(fit, log_axes)
+        y = fit["intercept"] + fit["slope"] * x
+        if log_axes:
+            # points at or below zero have no place on a log axis
+            x, y = x[y > 0], y[y > 0]
+        if not len(x):
+            continue
+        fig.add_trace(go.Scattergl(
+            x=x, y=y,
+            mode="lines", name=category, legendgroup=category, showlegend=False,
+            line=dict(color=colors.get(category)),
+            hovertemplate=("<b>OLS trendline</b><br>{} = {:.6g} * {} + {:.6g}<br>R<sup>2</sup>={:.6f}"
+                           "<br><br>Category={}<br>{}=%{{x}}<br>{}=%{{y}} <b>(trend)</b><extra></extra>")
+            .format(y_label, fit["slope"], x_label, fit["intercept"], fit["r_squared"],
+                    category, x_label, y_label)))
+    return fig
+
+
+def regression_diagnostics(category, y, file):
+    # full OLS summary for one category; statsmodels is only imported when asked for
+    import statsmodels.api as sm
+
+    df = load_comparison_projects(file)
+    df = df[df["category_parent_name"] == category]
+    model = sm.OLS(df[y].astype("float64"), sm.add_constant(df["pledged_usd"].astype("float64")))
+    return model.fit().summary()
@@ -1,50 +1,24 @@
-import streamlit as st
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import numpy as np
-
-
-# function to load data
-@st.cache_data
-def load_data(file):
-    df = pd.read_csv(file)
-    return df
+import math
 
+import streamlit as st
 
-# Load data
-df = load_data('most_funded_feb_2023.csv')
+from kickstarter.compat import fragment
+from kickstarter.distribution import load_pledged_distribution, quantile
+from kickstarter.figures import category_bar, pledged_histogram
+from kickstarter.instrumentation import rerun_timer
+from kickstarter.snapshots import page_context
 
-# filter out only US projects
-df = df[df['location_country'] == 'US']
 
-# rename null values to 'Other'
-df['category_parent_name'].fillna('Other', inplace=True)
+timer, dataset, country, file = page_context('distribution')
 
-# rename converted_pledged_amount to pledged_usd
-df.rename(columns={'converted_pledged_amount': 'pledged_usd'}, inplace=True)
+# Load sorted pledged amounts per category (selected country only, null categories renamed to 'Other')
+with timer.stage('load_data'):
+    distribution = load_pledged_distribution(file)
 
 # get unique categories
-unique_categories = df['category_parent_name'].unique()
-
-# group by category and calculate sum, count, and average
-grouped_df_category = df.groupby("category_parent_name").agg({"pledged_usd": ["sum", "count", "mean"]}).reset_index()
-
-# rename columns
-grouped_df_category.columns = ["Category", "Total pledged", "Total projects", "Average pledged per project"]
-
-# group by category and sum of backers
-grouped_df_backers = df.groupby("category_parent_name").agg({"backers_count": ["sum"]}).reset_index()
+unique_categories = list(distribution.sorted_values)
 
-# rename columns
-grouped_df_backers.columns = ["Category", "Total backers"]
 
-# merge grouped_df_category and grouped_df_backers
-grouped_df_category = pd.merge(grouped_df_category, grouped_df_backers, on="Category")
-
-
-# Create title
-st.title('Most Funded US Projects on Kickstarter')
 st.write('')
 
 # create sidebar
@@ -56,115 +30,74 @@ with st.sidebar:
     # create multiselect for categories
     selected_categories = st.multiselect('Select categories', sorted(unique_categories), default=sorted(unique_categories))
 
-    if selected_categories:
-        # filter df using selected categories
-        df = df[df['category_parent_name'].isin(selected_categories)]
-
-# Get min and max values for sliders
-min_pledged = int(df['pledged_usd'].min())
-max_pledged = int(df['pledged_usd'].max())
-
-# create columns that will hold metrics
-col1, col2 = st.columns(2)
-
-st.header('Apply filters to explore data 🔍')
-if max_pledged > min_pledged:
-    slider_input_pledged = st.slider('Filter by Pledged Amount', min_value=min_pledged, max_value=max_pledged, step=1000000,
-                                     value=(min_pledged, max_pledged), format='$%d')
-    # filter grouped_df using slider input
-    df = df[(df['pledged_usd'] >=
-                             slider_input_pledged[0]) & (df['pledged_usd'] <= slider_input_pledged[1])]
-
-# display metrics
-with col1:
-    st.metric("Median Pledged per Project", value="${:,.0f}".format(df['pledged_usd'].median()), delta=None)
-    st.metric("Average Pledged per Project", value="${:,.0f}".format(df['pledged_usd'].mean()), delta=None)
-with col2:
-    st.metric("25th Pct", value="${:,.0f}".format(np.percentile(df['pledged_usd'], 0.25)), delta=None)
-    st.metric("75th Pct", value="${:,.0f}".format(np.percentile(df['pledged_usd'], 0.75)), delta=None)
+# Get min and max values for sliders from the sorted arrays of the selected categories
+categories = tuple(sorted(selected_categories))
+min_pledged, max_pledged = map(int, distribution.value_bounds(categories))
 
-# create histogram
-fig = px.histogram(df, x="pledged_usd", title="Distribution of Pledged Amounts")
 
-# update xaxis title
-fig.update_xaxes(title_text="Pledged Amount (USD)", showgrid=False)
-# update yaxis title
-fig.update_yaxes(title_text="N", showgrid=False)
-# update on hover text
-fig.update_traces(hovertemplate="Pledged Amount: %{x:.2s}<extra></extra>")
-# set background color to gray
-fig.update_layout(plot_bgcolor='#f2f2f2', font=dict(size=14))
+def dollars(value):
+    return '–' if math.isnan(value) else '${:,.0f}'.format(value)
 
-st.plotly_chart(fig, use_container_width=True)
 
-# create a dropdown to select metric
-selected_metric = st.selectbox("Select a metric", ["Total pledged", "Average pledged per project", "Total projects", 'Total backers'])
+# the distribution section reruns on its own when its widgets change,
+# the category multiselect still reruns the whole page
+@fragment
+def pledged_distribution(file, categories, min_pledged, max_pledged):
+    fragment_timer = rerun_timer('distribution: pledged distribution')
 
-if selected_metric == "Total pledged":
-    # create a horizontal bar chart with categories
-    fig_2 = px.bar(grouped_df_category, x="Total pledged", y="Category", color="Total pledged", orientation='h',
-                   color_continuous_scale=px.colors.sequential.algae, title='Total Pledged per Category')
+    # the version the page rendered with, even if a newer snapshot was swapped in since
+    distribution = load_pledged_distribution(file)
 
-    # sort bar chart by total pledged
-    fig_2.update_layout(yaxis={'categoryorder': 'total ascending'},
-                        plot_bgcolor='#f2f2f2', font=dict(size=14))
+    # create columns that will hold metrics
+    col1, col2 = st.columns(2)
 
-    # update on hover text
-    fig_2.update_traces(hovertemplate="Total Pledged: %{x:.2s}<extra></extra>")
-    fig_2.update_coloraxes(showscale=False)
+    st.header('Apply filters to explore data 🔍')
+    slider_input_pledged = None
+    if max_pledged > min_pledged:
+        slider_input_pledged = st.slider('Filter by Pledged Amount', min_value=min_pledged, max_value=max_pledged, step=1000000,
+                                         value=(min_pledged, max_pledged), format='$%d')
 
-    # show chart
-    st.plotly_chart(fig_2, use_container_width=True)
+    # sorted pledged amounts of the selected categories within the slider range, as contiguous slices
+    with fragment_timer.stage('filter'):
+        selection = distribution.selection(categories, slider_input_pledged)
+        fragment_timer.set_rows(sum(len(values) for values in selection))
 
-elif selected_metric == "Average pledged per project":
-    # create a horizontal bar chart with categories
-    fig_2 = px.bar(grouped_df_category, x="Average pledged per project", y="Category", color="Average pledged per project", orientation='h',
-                   color_continuous_scale=px.colors.sequential.Brwnyl, title='Average Pledged per Category')
+    with fragment_timer.stage('quantiles'):
+        median_pledged = quantile(distribution, selection, 0.5)
+        mean_pledged = distribution.mean(categories, slider_input_pledged)
+        pct_25 = quantile(distribution, selection, 0.25)
+        pct_75 = quantile(distribution, selection, 0.75)
 
-    # sort bar chart by total pledged
-    fig_2.update_layout(yaxis={'categoryorder': 'total ascending'},
-                        plot_bgcolor='#f2f2f2', font=dict(size=14))
+    # display metrics, a range without projects has none to show
+    with col1:
+        st.metric("Median Pledged per Project", value=dollars(median_pledged), delta=None)
+        st.metric("Average Pledged per Project", value=dollars(mean_pledged), delta=None)
+    with col2:
+        st.metric("25th Pct", value=dollars(pct_25), delta=None)
+        st.metric("75th Pct", value=dollars(pct_75), delta=None)
 
-    # update on hover text
-    fig_2.update_traces(hovertemplate="Avg Pledged: %{x:.2s}<extra></extra>")
-    fig_2.update_coloraxes(showscale=False)
+    # create histogram from precomputed bin counts (cached per filter combination)
+    log_bins = st.checkbox('Log-scaled bins')
+    with fragment_timer.stage('figure: histogram'):
+        fig = pledged_histogram(categories, slider_input_pledged, log_bins, file=file)
 
-    # show chart
-    st.plotly_chart(fig_2, use_container_width=True)
+    fragment_timer.plotly_chart(fig, 'plotly_chart: histogram', use_container_width=True)
+    fragment_timer.finish(panel=False)
 
-elif selected_metric == "Total projects":
-    # create a horizontal bar chart with categories
-    fig_2 = px.bar(grouped_df_category, x="Total projects", y="Category", color="Total projects", orientation='h',
-                   color_continuous_scale=px.colors.sequential.Teal, title='Total Projects per Category')
 
-    # sort bar chart by total pledged
-    fig_2.update_layout(yaxis={'categoryorder': 'total ascending'},
-                        plot_bgcolor='#f2f2f2', font=dict(size=14))
+pledged_distribution(file, categories, min_pledged, max_pledged)
 
-    # update on hover text
-    fig_2.update_traces(hovertemplate="Total projects: %{x:.2s}<extra></extra>")
-    fig_2.update_coloraxes(showscale=False)
+# horizontal bar chart of the selected categories with every metric embedded, the
+# metric dropdown switches in the browser without a rerun (cached per selection)
+with timer.stage('figure: category bar'):
+    fig_2 = category_bar(categories, file=file)
 
-    # show chart
-    st.plotly_chart(fig_2, use_container_width=True)
-
-elif selected_metric == "Total backers":
-    # create a horizontal bar chart with categories
-    fig_2 = px.bar(grouped_df_category, x="Total backers", y="Category", color="Total backers", orientation='h',
-                   color_continuous_scale=px.colors.sequential.Tealgrn, title='Total Backers per Category')
-
-    # sort bar chart by total pledged
-    fig_2.update_layout(yaxis={'categoryorder': 'total ascending'},
-                        plot_bgcolor='#f2f2f2', font=dict(size=14))
-
-    # update on hover text
-    fig_2.update_traces(hovertemplate="Total backers: %{x:.2s}<extra></extra>")
-    fig_2.update_coloraxes(showscale=False)
-
-    # show chart
-    st.plotly_chart(fig_2, use_container_width=True)
+# show chart
+timer.plotly_chart(fig_2, 'plotly_chart: category bar', use_container_width=True)
 
 
 with st.sidebar:
     st.markdown('''The app created by [**@Oleksandr Arsentiev**](https://twitter.com/alexarsentiev) for the purpose of
-Streamlit App-A-Thon Contest''')
\ No newline at end of file
+Streamlit App-A-Thon Contest''')
+
+timer.finish()
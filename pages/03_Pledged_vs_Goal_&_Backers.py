@@ -1,75 +1,37 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-import numpy as np
-import statsmodels
 
-# function to load data
-@st.cache_data
-def load_data(file):
-    df = pd.read_csv(file)
-    return df
+from kickstarter.aggregates import category_goals
+from kickstarter.compat import fragment
+from kickstarter.data import load_comparison_projects
+from kickstarter.figures import projects_scatter
+from kickstarter.instrumentation import rerun_timer
+from kickstarter.snapshots import page_context
+from kickstarter.trendlines import regression_diagnostics
 
 
 #wide layout
 st.set_page_config(layout="wide")
 
-# Load data
-df = load_data('most_funded_feb_2023.csv')
+timer, dataset, country, file = page_context('goal')
 
-# filter out only US projects
-df = df[df['location_country'] == 'US']
+# Load the country's projects in categories with more than 10 projects, 'Other' dropped
+with timer.stage('load_data'):
+    df = load_comparison_projects(file)
 
-# rename null values to 'Other'
-df['category_parent_name'].fillna('Other', inplace=True)
+with timer.stage('aggregate'):
+    # average pledged, goal and percentage of goal per category, shared by every session
+    grouped_df = category_goals(file)
+    timer.set_rows(len(df))
 
-# rename converted_pledged_amount to pledged_usd
-df.rename(columns={'converted_pledged_amount': 'pledged_usd'}, inplace=True)
-df.rename(columns={'category_parent_name': 'Category'}, inplace=True)
-
-# group by category and count of projects
-grouped_df_count = df.groupby("Category").agg({"id": ["count"]}).reset_index()
-
-# rename columns
-grouped_df_count.columns = ["Category", "Count"]
-
-# filter df to keep only categories with more than 10 projects
-df = df[df['Category'].isin(grouped_df_count[grouped_df_count['Count'] > 10]['Category'])]
-
-# drop Other category
-df = df[df['Category'] != 'Other']
-
-# group by category and calculate mean of pledged usd
-grouped_df_category = df.groupby("Category").agg({"pledged_usd": ["mean"]}).reset_index()
-
-# rename columns
-grouped_df_category.columns = ["Category", "Avg pledged"]
-
-# group by category and calculate mean of goal
-grouped_df_goal = df.groupby("Category").agg({"goal": ["mean"]}).reset_index()
-
-# rename columns
-grouped_df_goal.columns = ["Category", "Avg goal"]
-
-# merge grouped_df_category and grouped_df_goal
-grouped_df = pd.merge(grouped_df_category, grouped_df_goal, on="Category")
-
-# calculate percentage of goal
-grouped_df['Percentage of goal'] = round(grouped_df['Avg pledged'] / grouped_df['Avg goal'] * 100, 0)
-
-# round avg pledged and avg goal to zero decimals
-grouped_df['Avg pledged'] = grouped_df['Avg pledged'].round(0)
-grouped_df['Avg goal'] = grouped_df['Avg goal'].round(0)
-
-# sort df by percentage of goal
-grouped_df.sort_values(by='Percentage of goal', ascending=False, inplace=True)
-
-# Create title
-st.title('Most Funded US Projects on Kickstarter')
 st.write('')
 st.write('')
 
+if df.empty:
+    st.info('No category in {} has more than 10 projects to compare.'.format(country))
+    timer.finish()
+    st.stop()
+
 # create sidebar
 st.sidebar.header('About')
 with st.sidebar:
@@ -83,65 +45,71 @@ with st.expander('Expand to see the data'):
     st.dataframe(grouped_df, use_container_width=True)
 
 
-selected_category = st.selectbox('Select category', grouped_df['Category'].unique())
+# the category comparison reruns on its own when the selectbox changes,
+# the scatter plots below don't depend on it
+@fragment
+def category_comparison(file, grouped_df):
+    fragment_timer = rerun_timer('goal: category comparison')
 
-# total pledged in selected category
-avg_pledged = grouped_df[grouped_df['Category'] == selected_category]['Avg pledged'].values[0]
-avg_goal = grouped_df[grouped_df['Category'] == selected_category]['Avg goal'].values[0]
-pct = grouped_df[grouped_df['Category'] == selected_category]['Percentage of goal'].values[0]
+    selected_category = st.selectbox('Select category', grouped_df['Category'].unique())
 
+    # total pledged in selected category
+    avg_pledged = grouped_df[grouped_df['Category'] == selected_category]['Avg pledged'].values[0]
+    avg_goal = grouped_df[grouped_df['Category'] == selected_category]['Avg goal'].values[0]
+    pct = grouped_df[grouped_df['Category'] == selected_category]['Percentage of goal'].values[0]
 
-formatted_avg_pledged = "{:.1f}M".format(avg_pledged / 1000000)
-st.write('')
-st.markdown('The average pledged amount per project in **{}** category is **{} USD**, which is :green[**{}%**] of the average goal of **{} USD**'
-             .format(selected_category.lower(), formatted_avg_pledged, int(pct), '{:0,.0f}'.format(avg_goal)))
 
-fig = go.Figure(go.Indicator(
-    mode = "number+gauge+delta", value = avg_pledged,
-    domain = {'x': [0.1, 1], 'y': [0, 1]},
-    title = {'text' :"<b>{}</b>".format(selected_category), 'font': {'size': 16}},
-    delta = {'reference': avg_goal},
-    number=dict(font=dict(size=26)),
-    gauge = {
-        'shape': "bullet",
-        'axis': {'range': [None, avg_pledged + avg_pledged * 0.1]},
-        'threshold': {
-            'line': {'color': "black", 'width': 2},
-            'thickness': 0.8,
-            'value': avg_goal}}))
+    formatted_avg_pledged = "{:.1f}M".format(avg_pledged / 1000000)
+    st.write('')
+    st.markdown('The average pledged amount per project in **{}** category is **{} USD**, which is :green[**{}%**] of the average goal of **{} USD**'
+                 .format(selected_category.lower(), formatted_avg_pledged, int(pct), '{:0,.0f}'.format(avg_goal)))
 
+    fig = go.Figure(go.Indicator(
+        mode = "number+gauge+delta", value = avg_pledged,
+        domain = {'x': [0.1, 1], 'y': [0, 1]},
+        title = {'text' :"<b>{}</b>".format(selected_category), 'font': {'size': 16}},
+        delta = {'reference': avg_goal},
+        number=dict(font=dict(size=26)),
+        gauge = {
+            'shape': "bullet",
+            'axis': {'range': [None, avg_pledged + avg_pledged * 0.1]},
+            'threshold': {
+                'line': {'color': "black", 'width': 2},
+                'thickness': 0.8,
+                'value': avg_goal}}))
 
-fig.update_layout(height=115, width=1200)
 
-# change top margin to bring graph closer to top
-fig.update_layout(margin=dict(t=30, b=20, l=0, r=0))
+    fig.update_layout(height=115, width=1200)
 
-st.plotly_chart(fig, use_container_width=False)
+    # change top margin to bring graph closer to top
+    fig.update_layout(margin=dict(t=30, b=20, l=0, r=0))
 
+    fragment_timer.plotly_chart(fig, 'plotly_chart: bullet', use_container_width=False)
 
-# create scatter plot of pledged and goal amounts
-fig_2 = px.scatter(df, x='pledged_usd', y='goal', color='Category', hover_data=['Category'],
-                   title='Distribution of pledged and goal amounts', trendline='ols')
+    # full regression output needs statsmodels, so it is only computed on request
+    with st.expander('Expand to see the regression diagnostics'):
+        if st.checkbox('Show full OLS regression output for the selected category'):
+            st.text(regression_diagnostics(selected_category, 'goal', file))
+            st.text(regression_diagnostics(selected_category, 'backers_count', file))
 
-# update axes names
-fig_2.update_xaxes(title_text='Pledged amount (USD)')
-fig_2.update_yaxes(title_text='Goal amount (USD)')
+    fragment_timer.finish(panel=False)
 
-# display chart
-st.plotly_chart(fig_2, use_container_width=True)
 
+category_comparison(file, grouped_df)
 
-# create scatter plot of pledged amount and number of backers
-fig_3 = px.scatter(df, x='pledged_usd', y='backers_count', color='Category', hover_data=['Category'],
-                   title='Distribution of pledged amount and number of backers', trendline='ols')
 
-# update axes names
-fig_3.update_xaxes(title_text='Pledged amount (USD)')
-fig_3.update_yaxes(title_text='Number of backers')
+# scatter plots of pledged and goal amounts and of pledged amount and number of backers,
+# built once with OLS trendlines from cached per-category fits
+with timer.stage('figure: pledged vs goal scatter'):
+    fig_2 = projects_scatter('goal', file=file)
+timer.plotly_chart(fig_2, 'plotly_chart: pledged vs goal scatter', use_container_width=True)
 
-# display chart
-st.plotly_chart(fig_3, use_container_width=True)
+with timer.stage('figure: pledged vs backers scatter'):
+    fig_3 = projects_scatter('backers_count', file=file)
+timer.plotly_chart(fig_3, 'plotly_chart: pledged vs backers scatter', use_container_width=True)
 
 with st.sidebar:
     st.markdown('''The app created by [**@Oleksandr Arsentiev**](https://twitter.com/alexarsentiev) for the purpose of
-    Streamlit App-A-Thon Contest''')
\ No newline at end of file
+    Streamlit App-A-Thon Contest''')
+
+timer.finish()
@@ -1,23 +1,95 @@
 import streamlit as st
 
-# Create title
-st.title('Most Funded US Projects on Kickstarter')
+from kickstarter.insights import MIN_PROJECTS, load_insights
+from kickstarter.snapshots import page_context
+
+timer, dataset, country, file = page_context('takeaways')
+
+# every number below is computed from the data once per partition and cached
+with timer.stage('insights'):
+    insights = load_insights(file)
+
+# US projects are located by state, other countries by region
+area = 'state' if country == 'US' else 'region'
+
+
+def millions(value):
+    return '{:,.1f} million USD'.format(value / 1000000)
+
+
+def usd(value):
+    return '{:,.0f} USD'.format(value)
+
+
+def names(values):
+    return ' and '.join([', '.join(values[:-1]), values[-1]]) if len(values) > 1 else ''.join(values)
+
+
+def strength(r):
+    return 'strong positive' if r >= 0.5 else 'positive' if r > 0.1 else 'negative' if r < -0.1 else 'no clear'
+
+
 st.header('Takeaways from the analysis')
 
+st.markdown('• The dataset consists of **{:,}** {} projects that were successfully funded on Kickstarter.'.format(insights['projects'], country))
+
+if insights['top_states']:
+    top_states = [state for state, _ in insights['top_states']]
+    most_projects = (' and the most number of projects' if insights['most_projects_state'] == top_states[0]
+                     else ', while **{}** has the most number of projects'.format(insights['most_projects_state']))
+    runners_up = (' **{}** {} on the next places.'.format(names(top_states[1:]), 'are' if len(top_states) > 2 else 'is')
+                  if len(top_states) > 1 else '')
+    st.markdown('• The {} with the **most funding**{} is **{}**.{}'.format(area, most_projects, top_states[0], runners_up))
+
+spread = ''
+if insights['state_average_pledged']:
+    low, high = insights['state_average_pledged']
+    spread = '; half of the {}s with more than {} projects average between **{}** and **{}**'.format(
+        area, MIN_PROJECTS, millions(low), millions(high))
+st.markdown('• The **average pledged amount** per project is **{}**{}.'.format(millions(insights['average_pledged']), spread))
+
+if insights['backers_range']:
+    (low_state, low), (high_state, high) = insights['backers_range']
+    st.markdown('• The **average number of backers** per project varies across {}s **from {:,.0f} in {} to {:,.0f} in {}** (considering only {}s with more than {} projects)'
+                .format(area, low, low_state, high, high_state, area, MIN_PROJECTS))
+
+if insights['dominant_category']:
+    state, category, share = insights['dominant_category']
+    st.markdown('• **{:.0%}** of projects from {} are in {} category'.format(share, state, category))
+
+if insights['category_leader'] and len(insights['top_states']) > 1:
+    state, category, pledged, projects = insights['category_leader']
+    st.markdown('• {} is the {} with **most funding** in {} category, having received **{}** for {} project{}'
+                .format(state, area, category, millions(pledged), projects, '' if projects == 1 else 's'))
+
+top_state, shares = insights['top_state_shares']
+if shares and len(insights['top_states']) > 1:
+    st.markdown('• {} is the {} with diverse categories of projects, with {} projects'.format(
+        top_state, area, names(['**{:.0%}** of {}'.format(share, category.lower()) for category, share in shares])))
+
+st.markdown('• The distribution of pledged amounts is {}, with maximum value reaching **{}**'.format(
+    'heavily **skewed to the right**' if insights['pledged_skew'] > 1 else 'fairly **symmetric**', millions(insights['pledged_max'])))
+st.markdown('• **Half of the projects**, however, collected less than **{}**'.format(millions(insights['pledged_median'])))
+
+if len(insights['top_categories']) > 1:
+    also = ' These are also categories with the most number of projects and backers' if insights['top_categories_lead_everywhere'] else ''
+    st.markdown('• {} **most funded** categories are **{}**.{}'.format(
+        ['', 'The', 'Two', 'Three'][len(insights['top_categories'])], names(insights['top_categories']), also))
+
+if insights['overfunded']:
+    category, goal, pledged = insights['overfunded'][0]
+    others = [category.lower() for category, _, _ in insights['overfunded'][1:]]
+    st.markdown('• The **most overfunded** category compared to the goal is **{}**, with the average goal of **{}**, and average pledged **{}**.{}'
+                .format(category, usd(goal), usd(pledged), ' {} {} on the next places'.format(names(others).capitalize(), 'are' if len(others) > 1 else 'is') if others else ''))
+
+if insights['correlations']:
+    correlations = insights['correlations']
+    st.markdown('• There is a **{}** correlation between pledged amount and number of backers (r = {:.2f}), and a **{}** correlation between pledged and goal amount (r = {:.2f})'
+                .format(strength(correlations['backers_count']), correlations['backers_count'],
+                        strength(correlations['goal']), correlations['goal']))
 
-st.markdown('• The dataset consists of **1633** US projects that were successfully funded on Kickstarter.')
-st.markdown('• The state with the **most funding** and the most number of projects is **California. New York and Washington** are on the 2nd and 3d places.')
-st.markdown('• The **average pledged amount** per project across almost all states is around **1 million USD.**')
-st.markdown('• The **average number of backers** per project varies greatrly across states **from 6,600 in New York to 12,700 in Colorado** (considering only states with more than 10 projects)')
-st.markdown('• **80%** of projects from Georgia are in Games category')
-st.markdown('• Utah is the state with **most funding** in Publishing category, having received **48.5 million USD** for only 2 projects')
-st.markdown('• California is the state with diverse categories of projects, with **27%** of tech, and **30%** of fashion and design projects')
-st.markdown('• The distribution of pledged amounts is heavily **skewed to the right**, with maximum value exceeding **40 million USD**')
-st.markdown('• **Most of the data points**, however, are concentrated around **1 million USD**')
-st.markdown('• Three **most funded** categories are **Games, Design and Technology**. These are also categories with the most number of projects and backers')
-st.markdown('• The **most overfunded** category compared to the goal is **Fashion**, with the average goal of **32,545 USD**, and average pledged **902,340 USD**. Publishing and design are on the 2nd and 3d places')
-st.markdown('• There is a **positive correlation** between both pledged amount and number of backers, and goal amount')
-st.markdown('• A project with the **most funding** is Surprise! Four Secret Novels by Brandon Sanderson, collecting a whooping **41 millon USD with 185k backers**')
+name, pledged, backers = insights['top_project']
+st.markdown('• A project with the **most funding** is {}, collecting a whooping **{} with {:,} backers**'.format(name, millions(pledged), backers))
 
 st.subheader('There are much more insights to uncover in this data set which is left up to the user to explore. Thanks for checking out my app!')
 
@@ -27,3 +99,4 @@ with st.sidebar:
     st.markdown('''The app created by [**@Oleksandr Arsentiev**](https://twitter.com/alexarsentiev) for the purpose of
     Streamlit App-A-Thon Contest''')
 
+timer.finish()
@@ -0,0 +1,73 @@
+import streamlit as st
+import plotly.graph_objects as go
+
+from kickstarter.scatter import category_colors
+from kickstarter.snapshots import page_context
+from kickstarter.timeseries import get_time_series_store, load_rolling_totals
+
+
+timer, dataset, country, _ = page_context('time trends')
+
+# monthly sums over every snapshot ingested so far, read once for the whole rerun
+with timer.stage('load_data'):
+    monthly, ingested = get_time_series_store().current
+
+# metric column in the monthly sums -> label
+METRICS = {'pledged_sum': 'Total pledged', 'project_count': 'Total projects', 'backers_sum': 'Total backers'}
+BASES = {'launched_at': 'Launch date', 'deadline': 'Deadline'}
+FREQUENCIES = {'M': 'Month', 'Q': 'Quarter'}
+
+
+st.caption('{} snapshot(s) in the time series'.format(len(ingested)))
+st.write('')
+
+if country not in monthly.index.get_level_values('location_country'):
+    st.info('The time series is still being built from the dataset snapshots, check back in a moment.')
+    timer.finish()
+    st.stop()
+
+unique_categories = monthly.xs(country, level='location_country').index.get_level_values('category_parent_name').unique()
+
+# create sidebar
+st.sidebar.header('About')
+with st.sidebar:
+    st.markdown('''This page shows rolling totals over time, aggregated incrementally from every monthly snapshot of the dataset.''')
+    selected_categories = st.multiselect('Select categories', sorted(unique_categories), default=sorted(unique_categories))
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    basis = st.selectbox('Time axis', list(BASES), format_func=BASES.get)
+with col2:
+    freq = st.selectbox('Bucket', list(FREQUENCIES), format_func=FREQUENCIES.get)
+with col3:
+    metric = st.selectbox('Metric', list(METRICS), format_func=METRICS.get)
+
+window = st.slider('Rolling window ({}s)'.format(FREQUENCIES[freq].lower()), min_value=1, max_value=24 if freq == 'M' else 8,
+                   value=12 if freq == 'M' else 4)
+
+categories = tuple(sorted(selected_categories))
+with timer.stage('rolling totals'):
+    totals = load_rolling_totals(ingested, country, basis, freq, metric, categories, window, _monthly=monthly)
+    timer.set_rows(totals.size)
+
+# one line per category, stacked so the top line is the total of the selection
+with timer.stage('figure: rolling totals'):
+    colors = category_colors(totals.columns)
+    fig = go.Figure()
+    for category in totals.columns:
+        fig.add_trace(go.Scatter(x=totals.index.to_timestamp(), y=totals[category], name=category, mode='lines',
+                                 stackgroup='categories', line=dict(width=0.5, color=colors[category])))
+    fig.update_layout(title='{} over rolling {} {}s by {}'.format(METRICS[metric], window, FREQUENCIES[freq].lower(),
+                                                                 BASES[basis].lower()),
+                      xaxis_title=BASES[basis], yaxis_title=METRICS[metric], hovermode='x unified')
+
+timer.plotly_chart(fig, 'plotly_chart: rolling totals', use_container_width=True)
+
+with st.expander('Expand to see the data'):
+    st.dataframe(totals.set_axis(totals.index.astype(str)), use_container_width=True)
+
+with st.sidebar:
+    st.markdown('''The app created by [**@Oleksandr Arsentiev**](https://twitter.com/alexarsentiev) for the purpose of
+Streamlit App-A-Thon Contest''')
+
+timer.finish()
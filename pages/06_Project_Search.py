@@ -0,0 +1,46 @@
+import time
+
+import streamlit as st
+
+from kickstarter.search import load_search_index, search_projects
+from kickstarter.snapshots import page_context
+
+
+timer, dataset, country, file = page_context('search')
+
+with timer.stage('load_data'):
+    load_search_index(file)
+
+st.write('')
+
+# create sidebar
+st.sidebar.header('About')
+with st.sidebar:
+    st.markdown('''This page finds projects by words in their name, blurb, creator or category.''')
+    st.markdown('''Matches in the project name rank highest, then creator, category and blurb; equally ranked projects are ordered by pledged amount.''')
+
+query = st.text_input('Search projects', placeholder='e.g. board game, sanderson, watch')
+prefix = st.checkbox('Match the last word as a prefix', value=True)
+
+if query:
+    started = time.perf_counter()
+    with timer.stage('search'):
+        results, total = search_projects(query, prefix, file=file)
+        timer.set_rows(total)
+    elapsed = time.perf_counter() - started
+
+    st.caption('{:,} matching projects in {:.1f} ms{}'.format(total, elapsed * 1000,
+                                                             ', showing the top {}'.format(len(results)) if total > len(results) else ''))
+    st.dataframe(results.drop(columns='Score'), use_container_width=True, hide_index=True,
+                 column_config={
+                     'Pledged (USD)': st.column_config.NumberColumn(format='$%d'),
+                     'Goal (USD)': st.column_config.NumberColumn(format='$%d'),
+                     '% of goal': st.column_config.NumberColumn(format='%d%%'),
+                     'Link': st.column_config.LinkColumn(display_text='Open'),
+                 })
+
+with st.sidebar:
+    st.markdown('''The app created by [**@Oleksandr Arsentiev**](https://twitter.com/alexarsentiev) for the purpose of
+Streamlit App-A-Thon Contest''')
+
+timer.finish()